@@ -2,21 +2,46 @@ import pygame
 from pygame.locals import *
 import pygame.surfarray as surfarray
 import sys
+import os
+import argparse
+import atexit
+import struct
 import numpy as np
 import random
+from math import ceil
+from time import perf_counter
 from itertools import cycle
-from flappy_bird_utils import load_data
+from flappy_bird_utils import get_data
+from flappy_bird_collision import CollisionChecker
+from flappy_bird_audio import get_audio
+from flappy_bird_profiler import EVENT, CHECK_SCORE, CHECK_NEW_PIPES, UPDATE, COLLISION, DRAW, SHOW_SCORE, FLIP, CAPTURE
 from abc import ABCMeta, abstractmethod
 
 
+# Game.snapshot(): rng state, frame_count, score, course_index,
+# bird y, vec_y, frame_index, last_time, base x, last_time, background_index,
+# pipe pair count, then per pair: x, upper y, lower y, last_time (unused pairs are zero)
+MAX_PIPE_PAIRS = 2
+SNAPSHOT = struct.Struct('<QIII' + 'iiBI' + 'iI' + 'BB' + 'iiiI' * MAX_PIPE_PAIRS)
+
+
 class ScoreRecorder(object):
-    """docstring for ScoreRecorder"""
+    """best score so far; with a path every score also goes to a persistent ScoreStore"""
 
-    def __init__(self):
+    def __init__(self, path=None, player='player'):
         super(ScoreRecorder, self).__init__()
+        self.player = player
+        self.store = None
         self.max_score = 0
-
-    def compare(self, score):
+        if path:
+            from flappy_bird_scores import ScoreStore, check_player
+            check_player(player)
+            self.store = ScoreStore(path)
+            self.max_score = self.store.max_score
+
+    def compare(self, score, player=None):
+        if self.store is not None:
+            self.store.add(score, player or self.player)
         if score > self.max_score:
             self.max_score = score
 
@@ -24,17 +49,53 @@ class ScoreRecorder(object):
         return self.max_score
 
 
-class Bird(pygame.sprite.Sprite):
+class SimRandom(object):
+    """per-game random source (splitmix64), same sequence on every platform"""
+
+    mask = (1 << 64) - 1
+
+    def __init__(self, seed=None):
+        super(SimRandom, self).__init__()
+        self.seed(seed)
+
+    def seed(self, seed=None):
+        if seed is None:
+            seed = random.getrandbits(64)
+        self.state = seed & self.mask
+
+    def next(self):
+        self.state = (self.state + 0x9E3779B97F4A7C15) & self.mask
+        z = self.state
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & self.mask
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & self.mask
+        return z ^ (z >> 31)
+
+    def randint(self, a, b):
+        return a + self.next() % (b - a + 1)
+
+    def getstate(self):
+        return self.state
+
+    def setstate(self, state):
+        self.state = state
+
+
+class Bird(pygame.sprite.DirtySprite):
     """docstring for bird"""
 
-    def __init__(self, frames, initial_pos, wing_sound):
-        pygame.sprite.Sprite.__init__(self)
+    def __init__(self, frames, initial_pos, wing_sound, masks):
+        pygame.sprite.DirtySprite.__init__(self)
+        # 每帧都在动，脏矩形模式下一直重画
+        self.dirty = 2
+        self.layer = 1
         self.frames = frames
+        self.masks = masks
         self.last_time = 0
         self.frame_index = 0
         self.x, self.y = initial_pos
         self.frame_nums = len(self.frames)
         self.image = self.frames[self.frame_index]
+        self.mask = self.masks[self.frame_index]
         self.rect = Rect(self.x, self.y, self.image.get_width(), self.image.get_height())
         self.wing_sound = wing_sound
 
@@ -93,18 +154,25 @@ class Bird(pygame.sprite.Sprite):
 
         self.calc_y()
         self.image = self.frames[self.frame_index]
-        self.rect = Rect(self.x, self.y, self.image.get_width(), self.image.get_height())
+        self.mask = self.masks[self.frame_index]
+        self.rect.x = self.x
+        self.rect.y = self.y
 
 
-class BaseFloor(pygame.sprite.Sprite):
+class BaseFloor(pygame.sprite.DirtySprite):
     """docstring for BaseFloor"""
 
-    def __init__(self, frame, initial_pos, base_shift):
-        pygame.sprite.Sprite.__init__(self)
+    def __init__(self, frame, initial_pos, base_shift, mask):
+        pygame.sprite.DirtySprite.__init__(self)
+        self.dirty = 2
+        self.layer = 2
         self.image = frame
+        self.mask = mask
         self.last_time = 0
         self.x, self.y = initial_pos
         self.base_shift = base_shift
+        # 对 base_shift(48) 取模，100 跟管子一样每帧 4 像素
+        self.speed = 100
         self.rect = Rect(self.x, self.y, self.image.get_width(), self.image.get_height())
 
     def get_x(self):
@@ -112,17 +180,19 @@ class BaseFloor(pygame.sprite.Sprite):
 
     def update(self, current_time, rate=60):
         if current_time > self.last_time + rate:
-            self.x = -((-self.x + 100) % self.base_shift)
+            self.x = -((-self.x + self.speed) % self.base_shift)
             self.last_time = current_time
 
-        self.rect = Rect(self.x, self.y, self.image.get_width(), self.image.get_height())
+        self.rect.x = self.x
 
 
-class Pipe(pygame.sprite.Sprite):
+class Pipe(pygame.sprite.DirtySprite):
     """docstring for Pipe"""
 
     def __init__(self, initial_x, initial_y, pipe_width):
         super(Pipe, self).__init__()
+        self.dirty = 2
+        self.layer = 0
         self.pipe_val_x = -4
         self.pipe_width = pipe_width
         self.set_pos(initial_x, initial_y)
@@ -131,6 +201,13 @@ class Pipe(pygame.sprite.Sprite):
         self.pipe_x = x
         self.pipe_y = y
 
+    def reset(self, x, y):
+        # 回收再用: 只改位置和时间，rect 原地改
+        self.set_pos(x, y)
+        self.last_time = 0
+        self.rect.x = x
+        self.rect.y = y
+
     def get_x(self):
         return self.pipe_x
 
@@ -145,9 +222,10 @@ class Pipe(pygame.sprite.Sprite):
 class PipeUpper(Pipe):
     """docstring for Pipes"""
 
-    def __init__(self, frame, initial_x, initial_y, pipe_width):
+    def __init__(self, frame, initial_x, initial_y, pipe_width, mask):
         super(PipeUpper, self).__init__(initial_x, initial_y, pipe_width)
         self.image = frame
+        self.mask = mask
         self.last_time = 0
         self.rect = Rect(self.pipe_x, self.pipe_y, self.image.get_width(), self.image.get_height())
 
@@ -159,15 +237,17 @@ class PipeUpper(Pipe):
         if self.pipe_x < -self.pipe_width:
             self.kill()
 
-        self.rect = Rect(self.pipe_x, self.pipe_y, self.image.get_width(), self.image.get_height())
+        self.rect.x = self.pipe_x
+        self.rect.y = self.pipe_y
 
 
 class PipeLower(Pipe):
     """docstring for Pipe"""
 
-    def __init__(self, frame, initial_x, initial_y, pipe_width):
+    def __init__(self, frame, initial_x, initial_y, pipe_width, mask):
         super(PipeLower, self).__init__(initial_x, initial_y, pipe_width)
         self.image = frame
+        self.mask = mask
         self.last_time = 0
         self.rect = Rect(self.pipe_x, self.pipe_y, self.image.get_width(), self.image.get_height())
 
@@ -179,24 +259,26 @@ class PipeLower(Pipe):
         if self.pipe_x < -self.pipe_width:
             self.kill()
 
-        self.rect = Rect(self.pipe_x, self.pipe_y, self.image.get_width(), self.image.get_height())
+        self.rect.x = self.pipe_x
+        self.rect.y = self.pipe_y
 
 
-class Title(pygame.sprite.Sprite):
+class Title(pygame.sprite.DirtySprite):
     """docstring for Title"""
 
     def __init__(self, initial_pos, frame, final_pos):
-        pygame.sprite.Sprite.__init__(self)
+        pygame.sprite.DirtySprite.__init__(self)
         self.x, self.y = initial_pos
         self.f_x, self.f_y = final_pos
         self.image = frame
+        self.rect = Rect(self.x, self.y, self.image.get_width(), self.image.get_height())
         self.last_time = 0
         self.vector = 0
         self.acc = .5
         self.vector_max = 5
 
     def calc_vector(self):
-        return np.max([self.vector + self.acc, self.vector_max])
+        return max(self.vector + self.acc, self.vector_max)
 
     def calc_y(self):
         self.vector = self.calc_vector()
@@ -206,18 +288,21 @@ class Title(pygame.sprite.Sprite):
         if current_time > self.last_time + rate:
             if self.y < self.f_y:
                 self.y = self.calc_y()
+                self.dirty = 1
             self.last_time = current_time
 
-        self.rect = Rect(self.x, self.y, self.image.get_width(), self.image.get_height())
+        self.rect.x = int(self.x)
+        self.rect.y = int(self.y)
 
 
-class Tutorial(pygame.sprite.Sprite):
+class Tutorial(pygame.sprite.DirtySprite):
     """docstring for Title"""
 
     def __init__(self, initial_pos, frame):
-        pygame.sprite.Sprite.__init__(self)
+        pygame.sprite.DirtySprite.__init__(self)
         self.x, self.y = initial_pos
         self.image = frame
+        self.rect = Rect(self.x, self.y, self.image.get_width(), self.image.get_height())
         self.last_time = 0
         self.alpha = 0
 
@@ -225,36 +310,150 @@ class Tutorial(pygame.sprite.Sprite):
         if current_time > self.last_time + rate:
             self.last_time = current_time
 
-        self.rect = Rect(self.x, self.y, self.image.get_width(), self.image.get_height())
+        self.rect.x = int(self.x)
+        self.rect.y = int(self.y)
+
+
+class ScoreBoard(pygame.sprite.DirtySprite):
+    """score digits as one sprite, only redrawn when the score changes"""
+
+    def __init__(self, numbers, center_x, y):
+        pygame.sprite.DirtySprite.__init__(self)
+        self.numbers = numbers
+        self.center_x = center_x
+        self.y = y
+        self.layer = 3
+        self.score = None
+        self.set_score(0)
+
+    def set_score(self, score):
+        if score == self.score:
+            return
+        self.score = score
+        digits = [self.numbers[int(x)] for x in str(score)]
+        width = sum(digit.get_width() for digit in digits)
+        height = max(digit.get_height() for digit in digits)
+        # 数字可能是 colorkey 图，不能拿来当格式模板
+        self.image = pygame.Surface((width, height), SRCALPHA, 32)
+        x = 0
+        for digit in digits:
+            self.image.blit(digit, (x, 0))
+            x += digit.get_width()
+        self.rect = Rect((self.center_x - width / 2, self.y), (width, height))
+        self.dirty = 1
+
+
+class FrameStack(object):
+    """ring buffer of the last k frames, read back oldest first without allocating"""
+
+    def __init__(self, k, shape, dtype=np.uint8):
+        super(FrameStack, self).__init__()
+        self.k = k
+        self.frames = np.zeros((k,) + tuple(shape), dtype=dtype)
+        self.stacked = np.zeros_like(self.frames)
+        # orders[i]: 写到第 i 格之后从旧到新的顺序
+        self.orders = np.array([[(i + 1 + j) % k for j in range(k)] for i in range(k)])
+        self.index = 0
+
+    def reset(self, frame):
+        self.frames[:] = frame
+        self.index = 0
+
+    def push(self, frame):
+        self.index = (self.index + 1) % self.k
+        self.frames[self.index] = frame
+
+    def get(self, out=None):
+        if out is None:
+            out = self.stacked
+        np.take(self.frames, self.orders[self.index], axis=0, out=out)
+        return out
 
 
 class Game(object):
     """docstring for Game"""
 
-    def __init__(self, recoder):
+    def __init__(self, recoder, headless=False, render=None, fixed_step=None, seed=None, obs_mode=None,
+                 dirty_render=False, collision='analytic', profiler=None, replay_recorder=None, audio=None,
+                 course=None, capture=None, early_flap=True, input_latency=None):
         super(Game, self).__init__()
         self.recoder = recoder
+        self.headless = headless
+        # headless 模式默认只跑逻辑，不画帧
+        self.render = not headless if render is None else render
+        # 观测: 'state' 直接从游戏状态取特征向量，'pixels' 返回画好的帧
+        self.obs_mode = obs_mode or ('pixels' if self.render else 'state')
+        if self.obs_mode == 'pixels':
+            self.render = True
+        # 脏矩形模式: 只重画动过的区域，只把这些区域送到 display.update
+        self.dirty_render = dirty_render and not headless
+        # 碰撞检测: 'mask' 逐对管子做像素检测，'analytic' 只看最近一对管子，矩形重叠时才做像素检测
+        self.collision = CollisionChecker(self, collision)
+        # 声音: 'null' 不开声卡什么都不播 (headless 默认)，'mixer' 每个声音一个保留声道，第一次播放时才解码
+        self.audio = get_audio(audio or ('null' if headless else 'mixer'))
+        # 可选的分阶段计时 (FrameProfiler)，None 时主循环不做任何计时
+        self.profiler = profiler
+        # 可选的录像 (ReplayRecorder)，只记每局开始时的随机数状态和扇动的帧号
+        self.replay_recorder = replay_recorder
+        # 可选的画面录制 (FrameCapture)，主循环只把帧拷进缓冲区，编码在后台线程
+        self.capture = capture
+        # 按键在两帧之间到达时: True 马上扇并重画小鸟 (不推进世界，帧间隔不变)，False 等到下一帧开头再扇
+        self.early_flap = early_flap
+        self.waited_presses = []
+        # 可选的输入延迟统计 (InputLatency): 按键到小鸟状态、按键到画面
+        self.input_latency = input_latency
+        # bird y, bird_vec_y, 到下一对管子的水平距离, 缺口上沿, 缺口下沿
+        self.state = np.zeros(5, dtype=np.float32)
+        # 'pixels' 观测的设置: 输出大小(宽, 高)、灰度、裁掉地面、叠帧数
+        self.obs_size = (84, 84)
+        self.obs_grayscale = True
+        self.obs_crop_floor = True
+        self.frame_stack = 1
+        self.pixel_buffers = {}
+        self.frame_stacker = None
+        # 固定步长: 精灵的时间由帧计数驱动，跟真实时间无关；headless 必须用固定步长
+        self.fixed_step = headless or bool(fixed_step)
+        self.random = SimRandom(seed)
         self.screen_width = 288
         self.screen_height = 512
         self.fps = 30
+        # 固定步长下每帧推进的模拟时间(ms)，大于精灵的 rate，保证每一帧精灵都会更新
+        self.frame_time = 1000 // self.fps
+        # 交互模式下一帧最早开始的时间 (perf_counter)
+        self.frame_seconds = 1.0 / self.fps
+        self.next_frame = 0
         self.pipe_gap_size = 100
+        self.course_index = 0
+        self.next_spacing = 0
+        self.set_course(course)
         self.base_pos = [0, self.screen_height * 0.79]
         self.score = 0
+        self.frame_count = 0
+        # 管子对象池: 场上的按 x 排好，出界的放回池子里下次再用
+        self.pipe_uppers = []
+        self.pipe_lowers = []
+        self.free_uppers = []
+        self.free_lowers = []
         self.initial()
         self.load_resources()
         self.initial_sprites()
-        self.welcome_game()
-        end_infos = self.main_game()
-        self.end_game(end_infos)
+        if not self.headless:
+            self.play()
 
     def initial(self):
-        pygame.init()
-        self.fps_clock = pygame.time.Clock()
+        if self.headless:
+            # 没有窗口和声卡也能跑
+            os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+            os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+        # 只初始化用得到的模块，声卡交给 audio 后端，字体到结算画面才用
+        pygame.display.init()
+        self.audio.init()
         self.screen = pygame.display.set_mode((self.screen_width, self.screen_height))
         pygame.display.set_caption('Flappy bird')
 
     def load_resources(self):
-        self.images, self.sounds, self.hit_mask = load_data()
+        self.images, _, self.hit_mask = get_data(sounds=False)
+        self.sounds = self.audio.get_sounds()
 
         self.bird_height = self.images['player'][0].get_height()
         self.bird_width = self.images['player'][0].get_width()
@@ -264,101 +463,478 @@ class Game(object):
         self.pipe_height = self.images['pipe'][0].get_height()
         self.pipe_width = self.images['pipe'][0].get_width()
 
-        self.title_height = self.images['title'].get_height()
-        self.title_width = self.images['title'].get_width()
-
-        self.score_panel_height = self.images['score_panel'].get_height()
-        self.score_panel_width = self.images['score_panel'].get_width()
-
         self.play_width = 80
-
-        self.tutorial_width = self.images['tutorial'].get_width()
-
-        self.background_index = np.random.randint(1, 3)
+        # 欢迎画面和结算画面上能点的区域
+        self.start_rect = Rect(self.screen_width / 2 - 30, self.screen_height / 2 - 30, 60, 60)
+        self.play_rect = Rect((self.screen_width - self.play_width) / 2, self.screen_height * 0.55, self.play_width, 40)
 
     def initial_sprites(self):
-        self.group = pygame.sprite.Group()
-        self.wel_group = pygame.sprite.Group()
+        if self.replay_recorder is not None:
+            self.replay_recorder.begin(self.random.getstate(), self.course_id)
+        self.background_index = self.random.randint(1, 2)
+
+        if self.dirty_render:
+            self.group = pygame.sprite.LayeredDirty()
+            self.group.clear(self.screen, self.images['background'][self.background_index])
+        else:
+            # 按 layer 画，管子后加进来也在地面下面
+            self.group = pygame.sprite.LayeredUpdates()
 
         bird_x = int(self.screen_width * 0.2)
         bird_y = int((self.screen_height - self.bird_height) / 2)
-        self.bird = Bird(self.images['player'], [bird_x, bird_y], self.sounds['wing'])
+        self.bird = Bird(self.images['player'], [bird_x, bird_y], self.sounds['wing'], self.hit_mask['player'])
 
-        new_pipe = self.get_random_pipes()
+        while self.pipe_uppers:
+            self.recycle_pipes()
+        self.course_index = 0
+        self.spawn_pipes()
 
-        self.pipe_uppers = []
-        self.pipe_lowers = []
+        self.base = BaseFloor(self.images['base'], self.base_pos, self.base_shift, self.hit_mask['base'])
+        if self.course is not None:
+            self.set_speed(self.course_row(0)['speed'])
 
-        self.pipe_uppers.append(PipeUpper(self.images['pipe'][0], new_pipe[0]['x'], new_pipe[0]['y'], self.pipe_width))
-        self.pipe_lowers.append(PipeLower(self.images['pipe'][1], new_pipe[1]['x'], new_pipe[1]['y'], self.pipe_width))
+        self.group.add(self.bird)
+        self.group.add(self.base)
+
+        if self.dirty_render:
+            self.score_board = ScoreBoard(self.images['numbers'], self.screen_width / 2, self.screen_height * 0.1)
+            self.group.add(self.score_board)
 
-        self.base = BaseFloor(self.images['base'], self.base_pos, self.base_shift)
+    def welcome_sprites(self):
+        # 欢迎画面的图只在真的显示时才转换
+        if self.dirty_render:
+            self.wel_group = pygame.sprite.LayeredDirty()
+            self.wel_group.clear(self.screen, self.images['background'][1])
+        else:
+            self.wel_group = pygame.sprite.Group()
 
-        title_x = (self.screen_width - self.title_width) / 2
-        self.title = Title([title_x, - self.title_height],
-                           self.images['title'], [title_x, self.screen_height * 0.15])
+        title_image = self.images['title']
+        title_x = (self.screen_width - title_image.get_width()) / 2
+        self.title = Title([title_x, - title_image.get_height()],
+                           title_image, [title_x, self.screen_height * 0.15])
 
-        tutorial_x = (self.screen_width - self.tutorial_width) / 2
-        self.tutorial = Tutorial([tutorial_x, self.screen_height * 0.35], self.images['tutorial'])
+        tutorial_image = self.images['tutorial']
+        tutorial_x = (self.screen_width - tutorial_image.get_width()) / 2
+        self.tutorial = Tutorial([tutorial_x, self.screen_height * 0.35], tutorial_image)
 
         self.wel_group.add(self.title)
         self.wel_group.add(self.tutorial)
 
-        self.group.add(self.pipe_uppers[0])
-        self.group.add(self.pipe_lowers[0])
-
-        self.group.add(self.bird)
-        self.group.add(self.base)
-
     def get_random_pipes(self):
         gap_ys = [20, 30, 40, 50, 60, 70, 80, 90, 100, 110]
-        index = random.randint(0, len(gap_ys) - 1)
+        index = self.random.randint(0, len(gap_ys) - 1)
         gap_y = gap_ys[index]
         gap_y += int(self.base_pos[1] * 0.2)
 
         pipe_x = self.screen_width + 10
 
-        return[
-            {'x': pipe_x, 'y': gap_y - self.pipe_height},
-            {'x': pipe_x, 'y': gap_y + self.pipe_gap_size}
-        ]
+        return pipe_x, gap_y - self.pipe_height, gap_y + self.pipe_gap_size
+
+    def set_course(self, course):
+        """switches to a course (array, .npy path or None for random pipes), used from the next reset."""
+        # 赛道: None 时用 SimRandom 随机出管子；否则按 flappy_bird_course 生成的数组出管子，
+        # 给路径的话内存映射，多个进程共用一份
+        self.course_id = 0
+        if course is not None:
+            from flappy_bird_course import load_course, check_course, course_id
+            if isinstance(course, str):
+                course = load_course(course)
+            else:
+                check_course(course)
+            # 录像里记下赛道，回放时只在同一条赛道上重放
+            self.course_id = course_id(course)
+        self.course = course
+        self.pipe_speed = 4
+
+    def course_row(self, index):
+        return self.course[index % len(self.course)]
+
+    def get_course_pipes(self):
+        row = self.course_row(self.course_index)
+        self.course_index += 1
+        self.next_spacing = int(self.course_row(self.course_index)['spacing'])
+        if self.pipe_uppers:
+            pipe_x = self.pipe_uppers[-1].get_x() + int(row['spacing'])
+        else:
+            pipe_x = self.screen_width + 10
+        gap_y = int(row['gap_y'])
+        return pipe_x, gap_y - self.pipe_height, gap_y + int(row['gap_size'])
+
+    def spawn_pipes(self):
+        if self.course is not None:
+            self.add_pipes(*self.get_course_pipes())
+        else:
+            self.add_pipes(*self.get_random_pipes())
+
+    def set_speed(self, speed):
+        # 整个画面一起变速，管子间距不变
+        self.pipe_speed = int(speed)
+        for u_pipe, l_pipe in zip(self.pipe_uppers, self.pipe_lowers):
+            u_pipe.pipe_val_x = l_pipe.pipe_val_x = -self.pipe_speed
+        self.base.speed = self.pipe_speed
+
+    def add_pipes(self, pipe_x, upper_y, lower_y):
+        if self.free_uppers:
+            u_pipe = self.free_uppers.pop()
+            l_pipe = self.free_lowers.pop()
+            u_pipe.reset(pipe_x, upper_y)
+            l_pipe.reset(pipe_x, lower_y)
+        else:
+            u_pipe = PipeUpper(self.images['pipe'][0], pipe_x, upper_y, self.pipe_width, self.hit_mask['pipe'][0])
+            l_pipe = PipeLower(self.images['pipe'][1], pipe_x, lower_y, self.pipe_width, self.hit_mask['pipe'][1])
+        u_pipe.pipe_val_x = l_pipe.pipe_val_x = -self.pipe_speed
+
+        self.pipe_uppers.append(u_pipe)
+        self.pipe_lowers.append(l_pipe)
+        self.group.add(u_pipe, l_pipe)
+
+    def recycle_pipes(self):
+        u_pipe = self.pipe_uppers.pop(0)
+        l_pipe = self.pipe_lowers.pop(0)
+        u_pipe.kill()
+        l_pipe.kill()
+        self.free_uppers.append(u_pipe)
+        self.free_lowers.append(l_pipe)
 
     def check_new_pipes(self):
         if self.pipe_uppers[0].get_x() < -self.pipe_width:
-            self.pipe_uppers.pop(0)
-            self.pipe_lowers.pop(0)
+            self.recycle_pipes()
+
+        if self.course is not None:
+            if self.pipe_uppers[-1].get_x() + self.next_spacing <= self.screen_width + 10:
+                self.spawn_pipes()
+            return
 
         threshold = 2 * self.pipe_width
 
         if threshold - 4 < self.pipe_uppers[0].get_x() < threshold:
-            new_pipe = self.get_random_pipes()
-
-            self.pipe_uppers.append(PipeUpper(self.images['pipe'][0],
-                                              new_pipe[0]['x'], new_pipe[0]['y'], self.pipe_width))
-            self.pipe_lowers.append(PipeLower(self.images['pipe'][1],
-                                              new_pipe[1]['x'], new_pipe[1]['y'], self.pipe_width))
-
-            self.group.add(self.pipe_uppers[-1])
-            self.group.add(self.pipe_lowers[-1])
-
-            self.base.kill()
-            self.group.add(self.base)
+            self.spawn_pipes()
 
     def check_collision(self):
-        for u_pipe, l_pipe in zip(self.pipe_uppers, self.pipe_lowers):
-            if pygame.sprite.collide_mask(self.bird, u_pipe) or pygame.sprite.collide_rect(self.bird, l_pipe):
-                return True
-        if pygame.sprite.collide_mask(self.bird, self.base):
-            return True
-        return False
+        return self.collision.check()
 
     def check_score(self):
         bird_mid_x = self.bird.get_x() + self.bird_width / 2
         for u_pipe in self.pipe_uppers:
             pipe_mid_x = u_pipe.get_x() + self.pipe_width / 2
-            if pipe_mid_x <= bird_mid_x < pipe_mid_x + 4:
+            # 每帧移动 speed 像素，中线恰好有一帧落在这个区间里
+            if pipe_mid_x <= bird_mid_x < pipe_mid_x - u_pipe.pipe_val_x:
                 self.sounds['point'].play()
                 self.score += 1
+                if self.course is not None:
+                    # 难度按分数走: 分数 i 时用第 i 对管子的速度
+                    self.set_speed(self.course_row(self.score)['speed'])
+
+    def get_ticks(self):
+        """advances the frame counter and returns the time sprites update against."""
+        self.frame_count += 1
+        if self.fixed_step:
+            return self.frame_count * self.frame_time
+        return pygame.time.get_ticks()
+
+    def wait_frame(self, on_press=None):
+        """sleeps until the next frame is due, 1 / fps after the last one started.
+
+        event.wait wakes up as soon as an event arrives instead of sleeping the
+        whole frame, so a press is stamped (perf_counter) when it comes in.
+        on_press(pressed, event) is called for each key or mouse press right
+        away; presses it does not handle (returns False) are kept for
+        read_input(). the world is never advanced here, so frames keep their
+        fixed cadence however often the player presses.
+        """
+        while True:
+            timeout = ceil((self.next_frame - perf_counter()) * 1000)
+            if timeout <= 0:
+                break
+            event = pygame.event.wait(timeout)
+            if event.type == NOEVENT:
+                continue
+            pressed = perf_counter()
+            if event.type == QUIT:
+                pygame.quit()
+                sys.exit()
+            if event.type == KEYDOWN or event.type == MOUSEBUTTONDOWN:
+                if on_press is None or not on_press(pressed, event):
+                    self.waited_presses.append((pressed, event))
+        # 跟 Clock.tick 一样，两帧开始的间隔至少 1 / fps
+        self.next_frame = perf_counter() + self.frame_seconds
+
+    def read_input(self):
+        """this frame's presses as [(perf_counter when seen, event)]: those kept by wait_frame plus the queued ones.
+
+        queued events are stamped now, when they are read.
+        """
+        presses = self.waited_presses
+        self.waited_presses = []
+        now = perf_counter()
+        for event in pygame.event.get():
+            if event.type == QUIT:
+                pygame.quit()
+                sys.exit()
+            if event.type == KEYDOWN or event.type == MOUSEBUTTONDOWN:
+                presses.append((now, event))
+        return presses
+
+    def early_press(self, pressed, event):
+        """wait_frame's on_press in main_game: a flap takes effect and is shown before the next frame starts."""
+        if event.type != KEYDOWN or (event.key != K_SPACE and event.key != K_UP):
+            return False
+        # 只改小鸟的速度和位置，不推进世界: 跟在下一帧开头扇是同一个状态，录像也记成下一帧
+        self.flap(self.frame_count + 1)
+        self.bird.rect.y = self.bird.y
+        if self.input_latency is not None:
+            self.input_latency.applied(pressed)
+        # 重画这一帧给玩家看，不算进 profiler 的帧
+        self.show_frame(self.draw_frame())
+        if self.input_latency is not None:
+            self.input_latency.displayed()
+        return True
+
+    def play(self):
+        """interactive episode loop: welcome, play, score screen, then a fresh episode."""
+        while True:
+            self.welcome_game()
+            end_infos = self.main_game()
+            self.end_game(end_infos)
+            self.reset()
+
+    def flap(self, frame=None):
+        """frame: the frame index a replay applies the flap on, the current one by default."""
+        if self.replay_recorder is not None:
+            self.replay_recorder.flap(self.frame_count if frame is None else frame)
+        self.bird.flappy()
+
+    def update_frame(self, ticks, prof=None):
+        """one fixed step of the world; with prof (main_game's FrameProfiler) each phase is timed."""
+        if prof is None:
+            self.check_score()
+            self.check_new_pipes()
+            self.group.update(ticks, self.fps)
+            return self.check_collision()
+        self.check_score()
+        prof.mark(CHECK_SCORE)
+        self.check_new_pipes()
+        prof.mark(CHECK_NEW_PIPES)
+        self.group.update(ticks, self.fps)
+        prof.mark(UPDATE)
+        crashed = self.check_collision()
+        prof.mark(COLLISION)
+        return crashed
+
+    def draw_frame(self, prof=None):
+        """draws the play field, returns the changed rects in dirty mode; with prof the phases are timed."""
+        overlay = self.profiler is not None and self.profiler.overlay
+        background = self.images['background'][self.background_index]
+        if self.dirty_render:
+            self.score_board.set_score(self.score)
+            if prof is not None:
+                prof.mark(SHOW_SCORE)
+            rects = self.group.draw(self.screen)
+            if prof is not None:
+                prof.mark(DRAW)
+            if overlay:
+                rects.append(self.profiler.draw_overlay(self.screen, background))
+            return rects
+        self.screen.blit(background, (0, 0))
+        self.group.draw(self.screen)
+        if prof is not None:
+            prof.mark(DRAW)
+        self.show_score()
+        if prof is not None:
+            prof.mark(SHOW_SCORE)
+        if overlay:
+            self.profiler.draw_overlay(self.screen)
+        return None
+
+    def show_frame(self, rects):
+        if self.dirty_render:
+            pygame.display.update(rects)
+        else:
+            pygame.display.flip()
+
+    def draw_background(self, group, background):
+        # 脏矩形模式下每个画面开始时先整屏画一次背景，精灵在下一次 draw 时全部重画
+        self.screen.blit(background, (0, 0))
+        group.repaint_rect(self.screen.get_rect())
+        pygame.display.flip()
+
+    def reset(self, seed=None):
+        """starts a new episode and returns the first observation."""
+        if seed is not None:
+            self.random.seed(seed)
+        self.score = 0
+        self.frame_count = 0
+        self.initial_sprites()
+        if self.render:
+            self.draw_frame()
+        return self.get_observation()
+
+    def snapshot(self):
+        """packs the simulation state into SNAPSHOT.size bytes, restore() puts it back.
+
+        only numbers are stored (no sprites or surfaces), so a planner can keep
+        thousands of them around and branch from any one.
+        """
+        bird, base = self.bird, self.base
+        pipes = [0] * (4 * MAX_PIPE_PAIRS)
+        i = 0
+        for u_pipe, l_pipe in zip(self.pipe_uppers, self.pipe_lowers):
+            pipes[i:i + 4] = u_pipe.pipe_x, u_pipe.pipe_y, l_pipe.pipe_y, u_pipe.last_time
+            i += 4
+        return SNAPSHOT.pack(self.random.state, self.frame_count, self.score, self.course_index,
+                             bird.y, bird.bird_vec_y, bird.frame_index, bird.last_time,
+                             base.x, base.last_time, self.background_index,
+                             len(self.pipe_uppers), *pipes)
+
+    def restore(self, snap):
+        """rewinds the game to a snapshot() of the same Game; sprites are reused, nothing is drawn."""
+        values = SNAPSHOT.unpack(snap)
+        (self.random.state, self.frame_count, self.score, self.course_index,
+         bird_y, bird_vec_y, frame_index, bird_last_time,
+         base_x, base_last_time, self.background_index, n_pipes) = values[:12]
+
+        bird = self.bird
+        bird.y = bird_y
+        bird.bird_vec_y = bird_vec_y
+        bird.frame_index = frame_index
+        bird.last_time = bird_last_time
+        bird.image = bird.frames[frame_index]
+        bird.mask = bird.masks[frame_index]
+        bird.rect.x = bird.x
+        bird.rect.y = bird_y
+
+        base = self.base
+        base.x = base_x
+        base.last_time = base_last_time
+        base.rect.x = base_x
+
+        # 管子数量对齐，多的放回池子，少的从池子里拿，位置下面统一改
+        while len(self.pipe_uppers) > n_pipes:
+            self.recycle_pipes()
+        while len(self.pipe_uppers) < n_pipes:
+            self.add_pipes(0, 0, 0)
+        i = 12
+        for u_pipe, l_pipe in zip(self.pipe_uppers, self.pipe_lowers):
+            pipe_x, upper_y, lower_y, last_time = values[i:i + 4]
+            u_pipe.reset(pipe_x, upper_y)
+            l_pipe.reset(pipe_x, lower_y)
+            u_pipe.last_time = l_pipe.last_time = last_time
+            # 出界的管子 update 时会 kill 自己，下一帧才回收，这里要放回 group
+            self.group.add(u_pipe, l_pipe)
+            i += 4
+
+        if self.course is not None:
+            self.next_spacing = int(self.course_row(self.course_index)['spacing'])
+            self.set_speed(self.course_row(self.score)['speed'])
+
+    def get_state(self):
+        """fills the preallocated state vector straight from game state, no rendering."""
+        bird_x = self.bird.get_x()
+        for u_pipe, l_pipe in zip(self.pipe_uppers, self.pipe_lowers):
+            if u_pipe.get_x() + self.pipe_width > bird_x:
+                break
+
+        state = self.state
+        state[0] = self.bird.get_y()
+        state[1] = self.bird.bird_vec_y
+        state[2] = u_pipe.get_x() - bird_x
+        state[3] = u_pipe.get_y() + self.pipe_height
+        state[4] = l_pipe.get_y()
+        return state
+
+    def get_pixel_buffers(self, size, grayscale, crop_floor):
+        key = (size, grayscale, crop_floor)
+        if key not in self.pixel_buffers:
+            if crop_floor:
+                source = self.screen.subsurface((0, 0, self.screen_width, int(self.base_pos[1])))
+            else:
+                source = self.screen
+            small = pygame.Surface(size, 0, self.screen)
+            # pixels3d 是 (x, y, 3) 的视图，转置成 (h, w, 3)；一直持有，scale 直接写进去
+            view = surfarray.pixels3d(small).transpose(1, 0, 2)
+            shape = (size[1], size[0]) if grayscale else (size[1], size[0], 3)
+            buffers = {
+                'source': source,
+                'small': small,
+                'view': view,
+                'scratch': np.zeros((size[1], size[0]), dtype=np.float32),
+                'weighted': np.zeros((size[1], size[0]), dtype=np.float32),
+                'out': np.zeros(shape, dtype=np.uint8)
+            }
+            self.pixel_buffers[key] = buffers
+        return self.pixel_buffers[key]
+
+    def get_pixels(self, out=None, size=None, grayscale=None, crop_floor=None):
+        """writes the drawn frame, downsampled (and grayscaled), into out.
+
+        out defaults to a buffer owned by the game that is overwritten every call;
+        the steady state allocates no arrays.
+        """
+        size = tuple(size or self.obs_size)
+        grayscale = self.obs_grayscale if grayscale is None else grayscale
+        crop_floor = self.obs_crop_floor if crop_floor is None else crop_floor
+
+        buffers = self.get_pixel_buffers(size, grayscale, crop_floor)
+        if out is None:
+            out = buffers['out']
+
+        pygame.transform.scale(buffers['source'], size, buffers['small'])
+        view = buffers['view']
+        if grayscale:
+            scratch, weighted = buffers['scratch'], buffers['weighted']
+            np.multiply(view[:, :, 0], 0.299, out=scratch)
+            np.multiply(view[:, :, 1], 0.587, out=weighted)
+            np.add(scratch, weighted, out=scratch)
+            np.multiply(view[:, :, 2], 0.114, out=weighted)
+            np.add(scratch, weighted, out=scratch)
+            np.copyto(out, scratch, casting='unsafe')
+        else:
+            np.copyto(out, view, casting='unsafe')
+        return out
+
+    def get_observation(self):
+        if self.obs_mode == 'state':
+            return self.get_state()
+
+        frame = self.get_pixels()
+        if self.frame_stack <= 1:
+            return frame
+        stacker = self.frame_stacker
+        if stacker is None or stacker.k != self.frame_stack or stacker.frames.shape[1:] != frame.shape:
+            self.frame_stacker = FrameStack(self.frame_stack, frame.shape)
+        # 新的一局用第一帧填满
+        if self.frame_count == 0:
+            self.frame_stacker.reset(frame)
+        else:
+            self.frame_stacker.push(frame)
+        return self.frame_stacker.get()
+
+    def step(self, action):
+        """advances exactly one frame, returns (observation, reward, done, score).
+
+        no clock throttling, no event pump and no display flip; the observation
+        is the state vector or the downsampled frame depending on obs_mode.
+        """
+        ticks = self.get_ticks()
+        if action:
+            self.flap()
+
+        last_score = self.score
+        done = self.update_frame(ticks)
+        if done and self.replay_recorder is not None:
+            self.replay_recorder.end(self.frame_count, self.score)
+
+        if self.render:
+            self.draw_frame()
+        observation = self.get_observation()
+
+        if done:
+            reward = -1
+        elif self.score > last_score:
+            reward = 1
+        else:
+            reward = 0.1
+        return observation, reward, done, self.score
 
     def show_score(self):
         score_digits = [int(x) for x in list(str(self.score))]
@@ -374,51 +950,59 @@ class Game(object):
             score_x += self.images['numbers'][digit].get_width()
 
     def welcome_game(self):
+        self.welcome_sprites()
+        if self.dirty_render:
+            self.draw_background(self.wel_group, self.images['background'][1])
         while True:
-            self.fps_clock.tick(self.fps)
-            ticks = pygame.time.get_ticks()
-            for event in pygame.event.get():
-                if event.type == QUIT:
-                    sys.exit()
-                if event.type == MOUSEBUTTONDOWN and event.button == 1:
-                    x, y = event.pos
-                    if self.screen_width / 2 - 30 < x < self.screen_width / 2 + 30 and self.screen_height / 2 - 30 < y < self.screen_height / 2 + 30:
-                        self.screen.fill((0, 0, 0))
-                        return
-                if event.type == KEYDOWN and event.key == K_SPACE:
+            self.wait_frame()
+            presses = self.read_input()
+            ticks = self.get_ticks()
+            for _, event in presses:
+                if ((event.type == MOUSEBUTTONDOWN and event.button == 1 and self.start_rect.collidepoint(event.pos)) or
+                        (event.type == KEYDOWN and event.key == K_SPACE)):
                     self.screen.fill((0, 0, 0))
                     return
 
-            self.screen.blit(self.images['background'][1], (0, 0))
+            if not self.dirty_render:
+                self.screen.blit(self.images['background'][1], (0, 0))
 
             self.wel_group.update(ticks, self.fps)
-            self.wel_group.draw(self.screen)
+            rects = self.wel_group.draw(self.screen)
 
-            pygame.display.flip()
+            self.show_frame(rects)
 
     def main_game(self):
+        # 欢迎画面也在数帧，这一局从第 0 帧开始，录下的扇动帧号才跟 replay 对得上
+        self.frame_count = 0
+        if self.dirty_render:
+            self.draw_background(self.group, self.images['background'][self.background_index])
+        prof = self.profiler
+        latency = self.input_latency
         while True:
-            # 顺序处理事件
-            pygame.event.pump()
-            self.fps_clock.tick(self.fps)
-            ticks = pygame.time.get_ticks()
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
+            self.wait_frame(self.early_press if self.early_flap else None)
+            if prof is not None:
+                prof.begin()
+            presses = self.read_input()
+            ticks = self.get_ticks()
+            for pressed, event in presses:
                 if event.type == KEYDOWN and (event.key == K_SPACE or event.key == K_UP):
-                    self.bird.flappy()
-
-            self.screen.blit(self.images['background'][self.background_index], (0, 0))
-
-            self.check_score()
-            self.check_new_pipes()
-
-            self.group.update(ticks, self.fps)
-            self.group.draw(self.screen)
-            self.show_score()
-
-            if self.check_collision():
+                    self.flap()
+                    if latency is not None:
+                        latency.applied(pressed)
+
+            if prof is not None:
+                prof.mark(EVENT)
+            crashed = self.update_frame(ticks, prof)
+            rects = self.draw_frame(prof)
+
+            if crashed:
+                if prof is not None:
+                    prof.end()
+                # 撞上的这一帧不会显示，里面的按键不算到画面的延迟
+                if latency is not None:
+                    latency.discard()
+                if self.replay_recorder is not None:
+                    self.replay_recorder.end(self.frame_count, self.score)
                 self.sounds['hit'].play()
                 self.sounds['die'].play()
                 end_u_pipes = []
@@ -439,7 +1023,16 @@ class Game(object):
                     'score': self.score
                 }
 
-            pygame.display.flip()
+            self.show_frame(rects)
+            if latency is not None:
+                latency.displayed()
+            if prof is not None:
+                prof.mark(FLIP)
+            if self.capture is not None:
+                self.capture.capture(self.screen)
+            if prof is not None:
+                prof.mark(CAPTURE)
+                prof.end()
 
     def end_game(self, end_infos):
         self.screen.fill((0, 0, 0))
@@ -451,54 +1044,94 @@ class Game(object):
         self.recoder.compare(score)
         max_score = self.recoder.get_max_score()
 
-        if score < 10:
-            medal_index = 0
-        elif score >= 10 and score < 30:
-            medal_index = 1
-        elif score >= 30 and score < 70:
-            medal_index = 2
-        else:
-            medal_index = 3
+        from flappy_bird_scores import medal_index
+        medal = medal_index(score)
 
+        pygame.font.init()
         font = pygame.font.Font(None, 23)
         score_text = font.render(str(score), True, (0, 0, 0))
         max_score_text = font.render(str(max_score), True, (0, 0, 0))
 
-        while True:
-            self.fps_clock.tick(self.fps)
-            ticks = pygame.time.get_ticks()
-            play_x = (self.screen_width - self.play_width) / 2
-
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-                if event.type == MOUSEBUTTONDOWN and event.button == 1:
-                    x, y = event.pos
-                    if play_x < x < play_x + 80 and self.screen_height * 0.55 < y < self.screen_height * 0.55 + 40:
-                        self.__init__(self.recoder)
-
-            self.screen.blit(self.images['background'][self.background_index], (0, 0))
-            for u_pipe, l_pipe in zip(u_pipes, l_pipes):
-                self.screen.blit(self.images['pipe'][0], (u_pipe['x'], u_pipe['y']))
-                self.screen.blit(self.images['pipe'][1], (l_pipe['x'], l_pipe['y']))
-
-            self.screen.blit(self.images['player'][bird['f_index']], (bird['x'], bird['y']))
-            self.screen.blit(self.images['base'], (base['x'], self.base_pos[1]))
-
-            panel_x = (self.screen_width - self.score_panel_width) / 2
-            panel_y = (self.screen_height - self.score_panel_height) / 2 - 50
-            self.screen.blit(self.images['score_panel'], (panel_x, panel_y))
-            self.screen.blit(self.images['medals'][medal_index], (panel_x + 30, panel_y + 45))
-            self.screen.blit(score_text, (panel_x + 185, panel_y + 40))
-            self.screen.blit(max_score_text, (panel_x + 190, panel_y + 80))
-
-            self.screen.blit(pygame.transform.smoothscale(
-                self.images['play'], (80, 40)), (play_x, self.screen_height * 0.55))
+        # 结算画面是静态的，只合成一次
+        self.screen.blit(self.images['background'][self.background_index], (0, 0))
+        for u_pipe, l_pipe in zip(u_pipes, l_pipes):
+            self.screen.blit(self.images['pipe'][0], (u_pipe['x'], u_pipe['y']))
+            self.screen.blit(self.images['pipe'][1], (l_pipe['x'], l_pipe['y']))
 
-            pygame.display.flip()
+        self.screen.blit(self.images['player'][bird['f_index']], (bird['x'], bird['y']))
+        self.screen.blit(self.images['base'], (base['x'], self.base_pos[1]))
+
+        panel_x = (self.screen_width - self.images['score_panel'].get_width()) / 2
+        panel_y = (self.screen_height - self.images['score_panel'].get_height()) / 2 - 50
+        self.screen.blit(self.images['score_panel'], (panel_x, panel_y))
+        self.screen.blit(self.images['medals'][medal], (panel_x + 30, panel_y + 45))
+        self.screen.blit(score_text, (panel_x + 185, panel_y + 40))
+        self.screen.blit(max_score_text, (panel_x + 190, panel_y + 80))
+
+        self.screen.blit(self.images['play_scaled'], self.play_rect)
 
+        pygame.display.flip()
+
+        # 画面不再变化，睡到下一个事件来
+        while True:
+            event = pygame.event.wait()
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                sys.exit()
+            if event.type == MOUSEBUTTONDOWN and event.button == 1 and self.play_rect.collidepoint(event.pos):
+                return
 
 if __name__ == '__main__':
-    recoder = ScoreRecorder()
-    game = Game(recoder)
+    parser = argparse.ArgumentParser(description='Flappy bird')
+    parser.add_argument('--profile', metavar='PATH', help='record per-phase frame timings, written to PATH at exit')
+    parser.add_argument('--overlay', action='store_true', help='draw frame time percentiles on screen')
+    parser.add_argument('--dirty', action='store_true', help='repaint only the changed regions')
+    parser.add_argument('--mute', action='store_true', help='no sound, the mixer is never opened')
+    parser.add_argument('--record', metavar='DIR', help='save every game as a replay in DIR (fixed-step timing)')
+    parser.add_argument('--scores', metavar='PATH', help='keep every score in a log at PATH, the best survives restarts')
+    parser.add_argument('--player', default='player', help='name the scores are recorded under')
+    parser.add_argument('--capture', metavar='PATH',
+                        help='record the played frames: a directory of PNGs, a .rgb file or a video through ffmpeg')
+    parser.add_argument('--capture-every', type=int, default=1, metavar='N', help='keep every N-th frame')
+    parser.add_argument('--input-latency', metavar='PATH',
+                        help='record press-to-flap and press-to-screen delays, percentiles written to PATH at exit')
+    parser.add_argument('--frame-aligned-input', action='store_true',
+                        help='apply presses at the start of the next frame instead of as soon as they arrive')
+    parser.add_argument('--serve', metavar='SOCKET',
+                        help='no window: serve headless games to agents on a unix socket (see flappy_bird_server)')
+    parser.add_argument('--course', metavar='PATH',
+                        help='play (or serve) a course .npy from flappy_bird_course instead of random pipes')
+    args = parser.parse_args()
+
+    if args.serve:
+        # 服务器模式只用 VectorFlappyBird，不开窗口
+        from flappy_bird_server import run
+        run(args.serve, args.course)
+        sys.exit()
+
+    # 只导入这次用得到的模块
+    replay_recorder = None
+    if args.record:
+        from flappy_bird_replay import ReplayRecorder
+        replay_recorder = ReplayRecorder(args.record)
+
+    capture = None
+    if args.capture:
+        from flappy_bird_capture import FrameCapture
+        capture = FrameCapture(args.capture, every=args.capture_every)
+        atexit.register(capture.close, sys.stderr)
+
+    input_latency = None
+    if args.input_latency:
+        from flappy_bird_input import InputLatency
+        input_latency = InputLatency(path=args.input_latency)
+
+    recoder = ScoreRecorder(args.scores, args.player)
+    game = Game(recoder, dirty_render=args.dirty,
+                fixed_step=bool(args.record), replay_recorder=replay_recorder,
+                audio='null' if args.mute else 'mixer', capture=capture,
+                early_flap=not args.frame_aligned_input, input_latency=input_latency, course=args.course)
+    if args.profile or args.overlay:
+        # 帧预算按游戏自己的帧率算
+        from flappy_bird_profiler import FrameProfiler
+        game.profiler = FrameProfiler(game.fps, overlay=args.overlay, path=args.profile)
@@ -0,0 +1,83 @@
+import pygame
+from flappy_bird_utils import get_sound
+
+
+sound_names = ('die', 'hit', 'point', 'swoosh', 'wing')
+
+
+class NullSound(object):
+    """stands in for a pygame Sound when nothing should be heard"""
+
+    def play(self):
+        pass
+
+
+class NullAudio(object):
+    """no mixer at all: the audio device is never opened and every sound is a no-op."""
+
+    def init(self):
+        pass
+
+    def get_sounds(self):
+        sound = NullSound()
+        return {name: sound for name in sound_names}
+
+
+class ChannelSound(object):
+    """decoded on the first play, always played on its own reserved channel.
+
+    Channel.play only hands the sound to the mixer thread and cuts off the
+    previous play of the same sound, so a burst of flaps never waits for or
+    steals a channel from the hit/die sounds.
+    """
+
+    def __init__(self, name, channel_id):
+        super(ChannelSound, self).__init__()
+        self.name = name
+        self.channel_id = channel_id
+        self.sound = None
+        self.channel = None
+
+    def play(self):
+        if self.sound is None:
+            self.sound = get_sound(self.name)
+            self.channel = pygame.mixer.Channel(self.channel_id)
+        self.channel.play(self.sound)
+
+
+class MixerAudio(object):
+    """pygame.mixer with one reserved channel per sound; falls back to silence without an audio device."""
+
+    def __init__(self):
+        super(MixerAudio, self).__init__()
+        self.enabled = False
+
+    def init(self):
+        try:
+            if not pygame.mixer.get_init():
+                pygame.mixer.init()
+        except pygame.error:
+            self.enabled = False
+            return
+        # 前 n 个声道留给各自的声音，不会被 Sound.play 自动分走
+        if pygame.mixer.get_num_channels() < len(sound_names):
+            pygame.mixer.set_num_channels(len(sound_names))
+        pygame.mixer.set_reserved(len(sound_names))
+        self.enabled = True
+
+    def get_sounds(self):
+        if not self.enabled:
+            return NullAudio().get_sounds()
+        return {name: ChannelSound(name, i) for i, name in enumerate(sound_names)}
+
+
+backends = {'null': NullAudio, 'mixer': MixerAudio}
+
+
+def get_audio(audio):
+    """an audio backend from its name ('null', 'mixer') or an object with init() and get_sounds()."""
+    if isinstance(audio, str):
+        if audio not in backends:
+            raise ValueError('unknown audio backend: %s' % audio)
+        return backends[audio]()
+    return audio
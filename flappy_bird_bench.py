@@ -0,0 +1,282 @@
+import os
+import sys
+import json
+import time
+import random
+import socket
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame
+import numpy as np
+import flappy_bird_utils
+from flappy_bird import Game, ScoreRecorder
+from flappy_bird_collision import CollisionChecker
+from flappy_bird_vec import VectorFlappyBird
+from flappy_bird_course import make_course
+from flappy_bird_server import Client
+
+
+def policy(state, rng):
+    """flaps when the bird sinks towards the bottom of the gap, with a little noise."""
+    return state[0] > state[4] - 40 or rng.random() < 0.01
+
+
+# run in a fresh interpreter: import, build a headless game, take one step
+STARTUP_SCRIPT = '''
+import time
+start = time.perf_counter()
+from flappy_bird import Game, ScoreRecorder
+imported = time.perf_counter()
+game = Game(ScoreRecorder(), headless=True, seed=0)
+created = time.perf_counter()
+game.step(False)
+print(imported - start, created - imported, time.perf_counter() - created)
+'''
+
+
+def timed(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return time.perf_counter() - start
+
+
+def bench_load(repeat):
+    seconds = timed(lambda: flappy_bird_utils.load_data(sounds=False), repeat) / repeat
+    images = flappy_bird_utils.get_images()
+    surfaces = images['player'] + images['pipe'] + [images['base']]
+    hitmask_seconds = timed(lambda: [flappy_bird_utils.getHitmask(img) for img in surfaces], repeat) / repeat
+    array_seconds = timed(lambda: [flappy_bird_utils.get_hitmask_array(img) for img in surfaces], repeat) / repeat
+    results = {
+        'load_data_ms': seconds * 1e3,
+        'get_hitmask_ms': hitmask_seconds * 1e3,
+        'get_hitmask_array_ms': array_seconds * 1e3,
+        'sprite_files_ms': timed(flappy_bird_utils.load_sprite_files, repeat) / repeat * 1e3
+    }
+    if flappy_bird_utils.load_atlas() is not None:
+        results['atlas_ms'] = timed(flappy_bird_utils.load_atlas, repeat) / repeat * 1e3
+    return results
+
+
+def bench_startup(repeat):
+    """process start to the end of the first step(), medians over fresh processes."""
+    rows = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, '-c', STARTUP_SCRIPT], stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL, cwd=os.path.dirname(os.path.abspath(__file__)))
+        line = proc.stdout.readline()
+        first_step = time.perf_counter() - start
+        proc.wait()
+        rows.append([first_step] + [float(x) for x in line.split()])
+    first_step, imported, created, stepped = (statistics.median(column) * 1e3 for column in zip(*rows))
+    return {
+        'first_step_ms': first_step,
+        'import_ms': imported,
+        'game_ms': created,
+        'step_ms': stepped
+    }
+
+
+def bench_step(game, steps, seed):
+    rng = random.Random(seed)
+    state = game.reset(seed)
+    episodes, best = 0, 0
+    start = time.perf_counter()
+    for _ in range(steps):
+        state, _, done, score = game.step(policy(state, rng))
+        if done:
+            episodes += 1
+            best = max(best, score)
+            state = game.reset()
+    seconds = time.perf_counter() - start
+    return {'frames_per_sec': steps / seconds, 'episodes': episodes, 'best_score': best}
+
+
+def bench_collision(game, repeat, seed):
+    game.reset(seed)
+    for _ in range(40):
+        game.step(False)
+    results = {}
+    for mode in CollisionChecker.modes:
+        check = CollisionChecker(game, mode).check
+        results[mode + '_checks_per_sec'] = repeat / timed(check, repeat)
+    return results
+
+
+def bench_snapshot(game, repeat, seed, depth=10):
+    game.reset(seed)
+    for _ in range(40):
+        game.step(False)
+    snap = game.snapshot()
+
+    def future():
+        game.restore(snap)
+        for _ in range(depth):
+            game.step(False)
+    return {
+        'bytes': len(snap),
+        'snapshot_us': timed(game.snapshot, repeat) / repeat * 1e6,
+        'restore_us': timed(lambda: game.restore(snap), repeat) / repeat * 1e6,
+        'futures_per_sec': repeat / 10 / timed(future, repeat // 10),
+        'future_depth': depth
+    }
+
+
+def bench_render(game, frames, seed):
+    rng = random.Random(seed)
+    game.reset(seed)
+    draw_seconds = flip_seconds = 0
+    for _ in range(frames):
+        _, _, done, _ = game.step(policy(game.get_state(), rng))
+        if done:
+            game.reset()
+        start = time.perf_counter()
+        game.draw_frame()
+        middle = time.perf_counter()
+        pygame.display.flip()
+        flip_seconds += time.perf_counter() - middle
+        draw_seconds += middle - start
+    return {
+        'frames_per_sec': frames / (draw_seconds + flip_seconds),
+        'draw_us': draw_seconds / frames * 1e6,
+        'flip_us': flip_seconds / frames * 1e6
+    }
+
+
+def bench_observation(game, repeat, seed):
+    game.reset(seed)
+    game.draw_frame()
+    gray = np.zeros((84, 84), dtype=np.uint8)
+    rgb = np.zeros((84, 84, 3), dtype=np.uint8)
+    return {
+        'state_us': timed(game.get_state, repeat) / repeat * 1e6,
+        'pixels_gray_84_us': timed(lambda: game.get_pixels(gray), repeat) / repeat * 1e6,
+        'pixels_rgb_84_us': timed(lambda: game.get_pixels(rgb, grayscale=False), repeat) / repeat * 1e6,
+        'array3d_us': timed(lambda: pygame.surfarray.array3d(game.screen), repeat) / repeat * 1e6
+    }
+
+
+def bench_vector(n, steps, seed, course=None):
+    env = VectorFlappyBird(n, seed=seed, course=course)
+    state = env.reset()
+    start = time.perf_counter()
+    for _ in range(steps):
+        state, _, _, _ = env.step(state[:, 0] > state[:, 4] - 40)
+    return {'games': n, 'env_steps_per_sec': n * steps / (time.perf_counter() - start)}
+
+
+def bench_server(steps, seed, sizes=(1, 256), clients=64, start_timeout=30.0):
+    """round trips to a flappy_bird_server subprocess with the reference client.
+
+    overhead_us is the round trip minus VectorFlappyBird.step in process, the
+    cost of the protocol and the socket; json_codec_us is what encoding and
+    decoding the same response as JSON alone would add. raises RuntimeError
+    when the server exits or does not listen within start_timeout seconds.
+    """
+    path = os.path.join(tempfile.mkdtemp(), 'flappy_bird.sock')
+    proc = subprocess.Popen([sys.executable, 'flappy_bird_server.py', path], stdout=subprocess.DEVNULL,
+                            stderr=subprocess.DEVNULL, cwd=os.path.dirname(os.path.abspath(__file__)))
+    try:
+        deadline = time.perf_counter() + start_timeout
+        while True:
+            if proc.poll() is not None:
+                raise RuntimeError('flappy_bird_server exited with status %d' % proc.returncode)
+            if time.perf_counter() > deadline:
+                raise RuntimeError('flappy_bird_server not listening after %g s' % start_timeout)
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(path)
+                break
+            except OSError:
+                time.sleep(0.05)
+            finally:
+                probe.close()
+
+        results = {}
+        for n in sizes:
+            actions = np.zeros(n, dtype=np.uint8)
+            client = Client(path, n, seed)
+            round_trip = timed(lambda: client.step(actions), steps) / steps
+            obs, rewards, dones, scores = client.step(actions)
+            client.close()
+            env = VectorFlappyBird(n, seed=seed)
+            local = timed(lambda: env.step(actions), steps) / steps
+
+            def json_codec():
+                json.loads(json.dumps({'obs': obs.tolist(), 'rewards': rewards.tolist(),
+                                       'dones': dones.tolist(), 'scores': scores.tolist()}))
+            results['games_%d' % n] = {
+                'round_trip_us': round_trip * 1e6,
+                'overhead_us': (round_trip - local) * 1e6,
+                'json_codec_us': timed(json_codec, steps) / steps * 1e6,
+                'env_steps_per_sec': n / round_trip
+            }
+
+        pool = [Client(path, 4, seed + i) for i in range(clients)]
+        actions = np.zeros(4, dtype=np.uint8)
+        rounds = max(1, steps // clients)
+        seconds = timed(lambda: [client.step(actions) for client in pool], rounds)
+        for client in pool:
+            client.close()
+        results['clients_%d' % clients] = {'requests_per_sec': clients * rounds / seconds}
+        return results
+    finally:
+        proc.terminate()
+        proc.wait()
+        if os.path.exists(path):
+            os.unlink(path)
+        os.rmdir(os.path.dirname(path))
+
+
+def run_benchmarks(seed=0, steps=20000, repeat=2000):
+    game = Game(ScoreRecorder(), headless=True, seed=seed)
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'seed': seed,
+            'steps': steps
+        },
+        'startup': bench_startup(5),
+        'load': bench_load(max(1, repeat // 200)),
+        'step': bench_step(game, steps, seed),
+        'collision': bench_collision(game, repeat * 10, seed),
+        'snapshot': bench_snapshot(game, repeat * 10, seed),
+        'render': bench_render(game, max(1, steps // 10), seed),
+        'observation': bench_observation(game, repeat, seed),
+        'vector': bench_vector(4096, max(1, steps // 100), seed),
+        'vector_course': bench_vector(4096, max(1, steps // 100), seed, make_course(seed, 1000, 'ramp')),
+        'server': bench_server(max(1, steps // 10), seed)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='headless flappy bird benchmarks, JSON output')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--steps', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=2000)
+    parser.add_argument('--output', help='write JSON here instead of stdout')
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.seed, args.steps, args.repeat)
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
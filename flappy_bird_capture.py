@@ -0,0 +1,185 @@
+import os
+import zlib
+import queue
+import shutil
+import struct
+import threading
+import subprocess
+from time import perf_counter
+import numpy as np
+import pygame
+
+
+# any encoder that takes ffmpeg's arguments and reads raw rgb24 frames on stdin
+ffmpeg = 'ffmpeg'
+# 24-bit frame buffers with the bytes in r, g, b order, the layout PNG and rgb24 both want
+RGB_MASKS = (0xff, 0xff00, 0xff0000, 0)
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+RAW_EXTENSIONS = ('.rgb', '.raw')
+
+
+def rgb_rows(surface, view):
+    """(h, 3 * w) uint8 rows of a RGB_MASKS surface from its get_view('0') proxy."""
+    width, height = surface.get_size()
+    return np.frombuffer(view, dtype=np.uint8).reshape(height, surface.get_pitch())[:, :3 * width]
+
+
+def png_chunk(tag, data):
+    return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data))
+
+
+def encode_png(surface, level=1):
+    """a RGB_MASKS surface as PNG bytes.
+
+    unlike pygame.image.save the deflate runs in one zlib call, which releases
+    the GIL, so an encoder thread does not hold up the game loop.
+    """
+    width, height = surface.get_size()
+    # 每行前面一个 0 字节: PNG 的 filter 类型 None
+    rows = np.zeros((height, 1 + 3 * width), dtype=np.uint8)
+    view = surface.get_view('0')
+    rows[:, 1:] = rgb_rows(surface, view)
+    del view
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return b''.join([PNG_SIGNATURE, png_chunk(b'IHDR', header),
+                     png_chunk(b'IDAT', zlib.compress(rows, level)), png_chunk(b'IEND', b'')])
+
+
+class FrameCapture(object):
+    """records frames without making the game wait for the encoder.
+
+    capture() blits the screen into one of a fixed number of preallocated
+    buffers and queues it; worker threads encode and hand the buffer back. when
+    every buffer is still being encoded the frame is dropped, never waited for.
+    every=n keeps only every n-th frame. output is a directory of PNGs, a
+    .rgb/.raw file of raw rgb24 frames, or any other file name, which is
+    encoded by piping raw frames into ffmpeg.
+    """
+
+    def __init__(self, output, size=(288, 512), fps=30, buffers=8, workers=2, every=1, level=1):
+        super(FrameCapture, self).__init__()
+        self.output = output
+        self.size = size
+        self.every = every
+        self.level = level
+
+        extension = os.path.splitext(output)[1].lower()
+        if not extension or os.path.isdir(output):
+            self.mode = 'png'
+            os.makedirs(output, exist_ok=True)
+        elif extension in RAW_EXTENSIONS:
+            self.mode = 'raw'
+        else:
+            self.mode = 'ffmpeg'
+        self.stream = None
+        self.process = None
+        if self.mode == 'raw':
+            self.stream = open(output, 'wb')
+        elif self.mode == 'ffmpeg':
+            if shutil.which(ffmpeg) is None:
+                raise ValueError('%s not found, capture to a directory (PNG) or a .rgb file instead' % ffmpeg)
+            self.process = subprocess.Popen(
+                [ffmpeg, '-loglevel', 'error', '-y', '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+                 '-s', '%dx%d' % size, '-r', '%g' % (fps / every), '-i', '-', '-pix_fmt', 'yuv420p', output],
+                stdin=subprocess.PIPE)
+            self.stream = self.process.stdin
+        # 视频流要按顺序写，只能一个线程
+        if self.stream is not None:
+            workers = 1
+
+        self.offered = 0
+        self.skipped = 0
+        self.dropped = 0
+        self.captured = 0
+        self.written = 0
+        self.failed = 0
+        self.encode_time = 0.0
+        self.stats_lock = threading.Lock()
+
+        self.free = queue.SimpleQueue()
+        for _ in range(buffers):
+            self.free.put(pygame.Surface(size, 0, 24, RGB_MASKS))
+        self.pending = queue.SimpleQueue()
+        self.workers = [threading.Thread(target=self.encode_loop, name='capture-%d' % i, daemon=True)
+                        for i in range(workers)]
+        for worker in self.workers:
+            worker.start()
+
+    def capture(self, surface):
+        """queues a copy of surface, returns False when the frame was skipped or dropped."""
+        index = self.offered
+        self.offered += 1
+        if index % self.every:
+            self.skipped += 1
+            return False
+        try:
+            buffer = self.free.get_nowait()
+        except queue.Empty:
+            self.dropped += 1
+            return False
+        buffer.blit(surface, (0, 0))
+        self.pending.put((index, buffer))
+        self.captured += 1
+        return True
+
+    def encode_loop(self):
+        while True:
+            item = self.pending.get()
+            if item is None:
+                return
+            index, buffer = item
+            start = perf_counter()
+            try:
+                self.write(index, buffer)
+                ok = True
+            except (OSError, ValueError):
+                ok = False
+            self.free.put(buffer)
+            with self.stats_lock:
+                if ok:
+                    self.written += 1
+                else:
+                    self.failed += 1
+                self.encode_time += perf_counter() - start
+
+    def write(self, index, buffer):
+        if self.mode == 'png':
+            with open(os.path.join(self.output, 'frame_%06d.png' % index), 'wb') as f:
+                f.write(encode_png(buffer, self.level))
+            return
+        view = buffer.get_view('0')
+        rows = rgb_rows(buffer, view)
+        self.stream.write(rows if rows.flags.c_contiguous else np.ascontiguousarray(rows))
+        del rows, view
+
+    def report(self):
+        with self.stats_lock:
+            return {
+                'mode': self.mode,
+                'offered': self.offered,
+                'captured': self.captured,
+                'skipped': self.skipped,
+                'dropped': self.dropped,
+                'written': self.written,
+                'failed': self.failed,
+                'encode_ms_mean': self.encode_time * 1e3 / max(self.written + self.failed, 1),
+            }
+
+    def close(self, log=None):
+        """waits for the queued frames to be encoded, returns report(); writes a summary line to log."""
+        if self.workers:
+            for _ in self.workers:
+                self.pending.put(None)
+            for worker in self.workers:
+                worker.join()
+            self.workers = []
+            if self.stream is not None:
+                self.stream.close()
+            if self.process is not None:
+                self.process.wait()
+        report = self.report()
+        if log is not None:
+            log.write('capture %(mode)s: %(captured)d of %(offered)d frames captured, %(dropped)d dropped, '
+                      '%(skipped)d skipped, %(written)d written, %(failed)d failed, '
+                      '%(encode_ms_mean).1f ms per frame\n' % report)
+        return report
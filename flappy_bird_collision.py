@@ -0,0 +1,106 @@
+import pygame
+import random
+
+
+class CollisionChecker(object):
+    """bird vs. pipes and floor for a Game.
+
+    mode 'mask' is the original pixel-perfect check over every pipe pair:
+    collide_mask on the upper pipe, collide_rect on the lower pipe and
+    collide_mask on the floor. mode 'analytic' gives the same answers but only
+    looks at the pipe pair overlapping the bird's x range, decides with rect
+    comparisons and runs the per-pixel bird mask test only when the bird's rect
+    actually overlaps the upper pipe (its corner at the gap) or the floor.
+    """
+
+    modes = ('mask', 'analytic')
+
+    def __init__(self, game, mode='analytic'):
+        super(CollisionChecker, self).__init__()
+        if mode not in self.modes:
+            raise ValueError('unknown collision mode: %s' % mode)
+        self.game = game
+        self.mode = mode
+        self.check = self.check_mask if mode == 'mask' else self.check_analytic
+
+    def check_mask(self):
+        game = self.game
+        for u_pipe, l_pipe in zip(game.pipe_uppers, game.pipe_lowers):
+            if pygame.sprite.collide_mask(game.bird, u_pipe) or pygame.sprite.collide_rect(game.bird, l_pipe):
+                return True
+        if pygame.sprite.collide_mask(game.bird, game.base):
+            return True
+        return False
+
+    def check_analytic(self):
+        game = self.game
+        bird = game.bird
+        rect = bird.rect
+
+        # pipes are ordered by x, at most one pair overlaps the bird horizontally
+        for u_pipe, l_pipe in zip(game.pipe_uppers, game.pipe_lowers):
+            u_rect = u_pipe.rect
+            if u_rect.x >= rect.right:
+                break
+            if u_rect.right <= rect.x:
+                continue
+            if rect.y < l_pipe.rect.bottom and rect.bottom > l_pipe.rect.y:
+                return True
+            if rect.y < u_rect.bottom and rect.bottom > u_rect.y:
+                if bird.mask.overlap(u_pipe.mask, (u_rect.x - rect.x, u_rect.y - rect.y)):
+                    return True
+            break
+
+        base_rect = game.base.rect
+        if rect.bottom > base_rect.y and rect.y < base_rect.bottom:
+            return bird.mask.overlap(game.base.mask, (base_rect.x - rect.x, base_rect.y - rect.y)) is not None
+        return False
+
+
+def verify(episodes=200, seed=0):
+    """checks both modes agree, returns (checks, collisions, disagreements).
+
+    first on every frame of random headless episodes, then on a sweep of bird
+    positions around the gap edges, the pipe corners and the floor for every
+    bird frame.
+    """
+    from flappy_bird import Game, ScoreRecorder
+
+    game = Game(ScoreRecorder(), headless=True, seed=seed, collision='analytic')
+    reference = CollisionChecker(game, 'mask')
+    policy = random.Random(seed)
+    checks = hits = disagreements = 0
+
+    for _ in range(episodes):
+        game.reset()
+        flap_rate = policy.choice([0.05, 0.1, 0.2])
+        offset = policy.randint(-40, 40)
+        done = False
+        while not done:
+            state = game.get_state()
+            flap = state[0] + offset > state[4] - 40 and policy.random() < flap_rate * 3
+            _, _, done, _ = game.step(flap or policy.random() < flap_rate / 4)
+            checks += 1
+            hits += done
+            disagreements += done != reference.check()
+
+    game.reset()
+    bird, u_pipe, l_pipe = game.bird, game.pipe_uppers[0], game.pipe_lowers[0]
+    gap_y = u_pipe.rect.bottom
+    for frame_index in range(bird.frame_nums):
+        bird.image = bird.frames[frame_index]
+        bird.mask = bird.masks[frame_index]
+        for pipe_x in range(bird.x - game.pipe_width - 4, bird.rect.width + bird.x + 4):
+            u_pipe.rect.x = l_pipe.rect.x = pipe_x
+            for y in list(range(gap_y - 40, gap_y + game.pipe_gap_size + 10)) + \
+                    list(range(int(game.base_pos[1]) - 40, int(game.base_pos[1]) + 10)):
+                bird.rect.y = y
+                hit = game.collision.check()
+                checks += 1
+                hits += hit
+                disagreements += hit != reference.check()
+    return checks, hits, disagreements
+
+
+if __name__ == '__main__':
+    print('checks %d, collisions %d, disagreements %d' % verify())
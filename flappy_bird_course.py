@@ -0,0 +1,114 @@
+import sys
+import hashlib
+import argparse
+import numpy as np
+from collections import namedtuple
+
+
+# one row per pipe pair in the order they appear, 8 bytes a pipe:
+# top of the gap, gap height, pixels scrolled per frame while the bird is heading
+# for this pipe, horizontal distance from the previous pipe
+course_dtype = np.dtype([('gap_y', '<i2'), ('gap_size', '<i2'), ('speed', '<i2'), ('spacing', '<i2')])
+
+# difficulty from pipe (= score) start on until the next stage: gap size, the
+# range and step of the gap's top y, scroll speed and spacing between pipes
+Stage = namedtuple('Stage', ['start', 'gap_size', 'gap_min', 'gap_max', 'gap_step', 'speed', 'spacing'])
+
+schedules = {
+    # the original game: gaps at 100..190, 100 high, 4 px a frame, a pipe every 196 px
+    'classic': [Stage(0, 100, 100, 190, 10, 4, 196)],
+    'ramp': [
+        Stage(0, 120, 120, 180, 10, 3, 220),
+        Stage(10, 110, 100, 200, 10, 4, 200),
+        Stage(30, 100, 80, 220, 10, 5, 196),
+        Stage(70, 90, 60, 240, 5, 6, 184),
+    ],
+}
+
+# Game geometry the rows have to fit: pipes spawn at x = 298 and are recycled
+# below x = -52, so at most two pairs are on screen when the spacing is over 175,
+# and with spacing <= 300 and speed <= 20 the next pair always spawns before the
+# last one leaves; the floor starts at y = 404
+min_spacing = 176
+max_spacing = 300
+max_speed = 20
+floor_y = 404
+
+
+def check_stage(stage):
+    if not min_spacing <= stage.spacing <= max_spacing:
+        raise ValueError('spacing must be in [%d, %d]: %r' % (min_spacing, max_spacing, stage))
+    if not 0 < stage.speed <= max_speed:
+        raise ValueError('speed must be in [1, %d]: %r' % (max_speed, stage))
+    if stage.gap_step <= 0 or stage.gap_size <= 0:
+        raise ValueError('gap_step and gap_size must be positive: %r' % (stage,))
+    if not 0 <= stage.gap_min <= stage.gap_max or stage.gap_max + stage.gap_size > floor_y:
+        raise ValueError('gaps must lie between the top of the screen and the floor: %r' % (stage,))
+
+
+def make_course(seed, n_pipes=1000, schedule='classic'):
+    """the pipe sequence for a seed and a difficulty schedule (a name from schedules or a list of Stage)."""
+    if isinstance(schedule, str):
+        schedule = schedules[schedule]
+    stages = sorted(schedule, key=lambda stage: stage.start)
+    if not stages or stages[0].start != 0:
+        raise ValueError('the first stage has to start at 0')
+
+    rng = np.random.default_rng(seed)
+    course = np.zeros(n_pipes, dtype=course_dtype)
+    ends = [stage.start for stage in stages[1:]] + [n_pipes]
+    for stage, end in zip(stages, ends):
+        check_stage(stage)
+        rows = course[stage.start:end]
+        levels = (stage.gap_max - stage.gap_min) // stage.gap_step + 1
+        rows['gap_y'] = stage.gap_min + stage.gap_step * rng.integers(0, levels, size=len(rows))
+        rows['gap_size'] = stage.gap_size
+        rows['speed'] = stage.speed
+        rows['spacing'] = stage.spacing
+    return course
+
+
+def save_course(path, course):
+    np.save(path, np.asarray(course, dtype=course_dtype))
+
+
+def check_course(course, name='course'):
+    """raises ValueError unless every row fits the same bounds check_stage puts on a schedule."""
+    if getattr(course, 'dtype', None) != course_dtype or course.ndim != 1 or len(course) == 0:
+        raise ValueError('%s is not a flappy bird course' % name)
+    # 间距小于 176 时场上会超过两对管子，Game.snapshot 和 VectorFlappyBird 都放不下
+    spacing, speed = course['spacing'], course['speed']
+    gap_y, gap_size = course['gap_y'], course['gap_size']
+    bad = ((spacing < min_spacing) | (spacing > max_spacing) | (speed <= 0) | (speed > max_speed) |
+           (gap_size <= 0) | (gap_y < 0) | (gap_y.astype(np.int32) + gap_size > floor_y))
+    if bad.any():
+        row = int(np.argmax(bad))
+        raise ValueError('%s: pipe %d is out of bounds: %r' % (name, row, course[row]))
+
+
+def load_course(path, mmap=True):
+    """a saved course, memory-mapped read-only by default so every process shares the same pages."""
+    course = np.load(path, mmap_mode='r' if mmap else None)
+    check_course(course, path)
+    return course
+
+
+def course_id(course):
+    """64-bit hash of a course's rows; replays store it so they are only replayed on the same course (0: no course)."""
+    rows = np.ascontiguousarray(course, dtype=course_dtype)
+    digest = hashlib.blake2b(rows.tobytes(), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') or 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='generate a flappy bird course as .npy')
+    parser.add_argument('path')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--pipes', type=int, default=1000)
+    parser.add_argument('--schedule', choices=sorted(schedules), default='classic')
+    args = parser.parse_args(argv)
+    save_course(args.path, make_course(args.seed, args.pipes, args.schedule))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
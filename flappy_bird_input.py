@@ -0,0 +1,66 @@
+import json
+import atexit
+import numpy as np
+from time import perf_counter
+
+
+class InputLatency(object):
+    """how long a flap takes from the key press to the bird and to the screen.
+
+    the game calls applied() right after a flap changed the bird, displayed()
+    once that is on screen and discard() when the frame with the flap is never
+    shown (the bird crashed on it). delays go into fixed-size ring buffers
+    (seconds).
+
+    presses are stamped when the game sees them, not when SDL queued them
+    (pygame events carry no timestamp): Game.wait_frame() stamps a press the
+    moment it wakes up on it, but one that arrives while a frame is being
+    worked on is only stamped when read_input() reads it at the start of the
+    next frame. delays are short by up to that frame's work time.
+    """
+
+    def __init__(self, capacity=4096, path=None):
+        super(InputLatency, self).__init__()
+        self.capacity = capacity
+        self.to_state = np.zeros(capacity)
+        self.to_display = np.zeros(capacity)
+        self.count = 0
+        self.shown = 0
+        self.pending = []
+
+        if path:
+            atexit.register(self.dump, path)
+
+    def applied(self, pressed):
+        self.to_state[self.count % self.capacity] = perf_counter() - pressed
+        self.count += 1
+        self.pending.append(pressed)
+
+    def displayed(self):
+        if not self.pending:
+            return
+        now = perf_counter()
+        for pressed in self.pending:
+            self.to_display[self.shown % self.capacity] = now - pressed
+            self.shown += 1
+        del self.pending[:]
+
+    def discard(self):
+        del self.pending[:]
+
+    def summary(self):
+        """percentiles of both delays over the buffered presses, in ms."""
+        results = {'presses': self.count}
+        for name, delays, count in (('to_state', self.to_state, self.count),
+                                    ('to_display', self.to_display, self.shown)):
+            n = min(count, self.capacity)
+            if n == 0:
+                continue
+            ms = delays[:n] * 1e3
+            p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+            results[name] = {'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99, 'max_ms': ms.max()}
+        return results
+
+    def dump(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
@@ -0,0 +1,180 @@
+import os
+import numpy as np
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+
+# Game attributes that change the observation; GamePool takes them with the
+# Game keyword arguments and sets them on every game
+obs_settings = ('obs_size', 'obs_grayscale', 'obs_crop_floor', 'frame_stack')
+
+
+def observation_spec(obs_mode, obs_size=(84, 84), obs_grayscale=True, obs_crop_floor=True, frame_stack=1):
+    """shape and dtype of one observation, same rules and defaults as Game.get_observation."""
+    if obs_mode == 'state':
+        return (5,), np.float32
+    width, height = obs_size
+    shape = (height, width) if obs_grayscale else (height, width, 3)
+    if frame_stack > 1:
+        shape = (frame_stack,) + shape
+    return shape, np.uint8
+
+
+class SharedBuffers(object):
+    """the arrays the controller and the workers exchange, all in shared memory"""
+
+    def __init__(self, n_games, obs_spec, names=None):
+        super(SharedBuffers, self).__init__()
+        obs_shape, obs_dtype = obs_spec
+        specs = [
+            ('actions', (n_games,), np.uint8),
+            ('observations', (n_games,) + obs_shape, obs_dtype),
+            ('rewards', (n_games,), np.float32),
+            ('dones', (n_games,), np.bool_),
+            ('scores', (n_games,), np.int32),
+        ]
+        self.blocks = {}
+        self.arrays = {}
+        for key, shape, dtype in specs:
+            size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+            if names is None:
+                block = shared_memory.SharedMemory(create=True, size=size)
+            else:
+                block = shared_memory.SharedMemory(name=names[key])
+            self.blocks[key] = block
+            self.arrays[key] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+    def names(self):
+        return {key: block.name for key, block in self.blocks.items()}
+
+    def close(self, unlink=False):
+        self.arrays = {}
+        for block in self.blocks.values():
+            block.close()
+            if unlink:
+                block.unlink()
+
+
+def run_worker(conn, names, n_games, obs_mode, obs_spec, lo, hi, seed, settings, game_kwargs):
+    """hosts games lo..hi-1 headless and steps them on the controller's command."""
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+    from flappy_bird import Game, ScoreRecorder
+
+    buffers = SharedBuffers(n_games, obs_spec, names)
+    actions = buffers.arrays['actions']
+    observations = buffers.arrays['observations']
+    rewards = buffers.arrays['rewards']
+    dones = buffers.arrays['dones']
+    scores = buffers.arrays['scores']
+
+    recoder = ScoreRecorder()
+    games = []
+    for i in range(lo, hi):
+        game_seed = None if seed is None else seed + i
+        game = Game(recoder, headless=True, seed=game_seed, obs_mode=obs_mode, **game_kwargs)
+        for key, value in settings.items():
+            setattr(game, key, value)
+        games.append(game)
+
+    try:
+        while True:
+            cmd = conn.recv()
+            if cmd == 'step':
+                for i, game in enumerate(games, lo):
+                    obs, rewards[i], dones[i], scores[i] = game.step(actions[i])
+                    if dones[i]:
+                        recoder.compare(scores[i])
+                        obs = game.reset()
+                    observations[i] = obs
+            elif cmd == 'reset':
+                for i, game in enumerate(games, lo):
+                    observations[i] = game.reset()
+                    rewards[i], dones[i], scores[i] = 0, False, 0
+            elif cmd == 'max_score':
+                conn.send(recoder.get_max_score())
+                continue
+            else:
+                break
+            conn.send(True)
+    finally:
+        buffers.close()
+        conn.close()
+
+
+class GamePool(object):
+    """n headless games spread over worker processes, stepped in batches.
+
+    observations, rewards, dones and scores live in multiprocessing.shared_memory;
+    the pipes to the workers only carry the one-word commands. the arrays returned
+    by reset()/step() are views on that memory and are overwritten by the next call.
+    finished games are reset automatically, their final score is in scores.
+    obs_size, obs_grayscale, obs_crop_floor and frame_stack among game_kwargs are
+    set on every game and shape the observations array.
+    """
+
+    def __init__(self, n_games, n_workers=None, seed=None, obs_mode='state', start_method=None, **game_kwargs):
+        super(GamePool, self).__init__()
+        self.n_games = n_games
+        self.n_workers = min(n_workers or os.cpu_count() or 1, n_games)
+        settings = {key: game_kwargs.pop(key) for key in obs_settings if key in game_kwargs}
+        if 'obs_size' in settings:
+            settings['obs_size'] = tuple(settings['obs_size'])
+        obs_spec = observation_spec(obs_mode, **settings)
+        self.buffers = SharedBuffers(n_games, obs_spec)
+        self.actions = self.buffers.arrays['actions']
+        self.observations = self.buffers.arrays['observations']
+        self.rewards = self.buffers.arrays['rewards']
+        self.dones = self.buffers.arrays['dones']
+        self.scores = self.buffers.arrays['scores']
+
+        ctx = mp.get_context(start_method)
+        bounds = np.linspace(0, n_games, self.n_workers + 1).astype(int)
+        self.conns = []
+        self.workers = []
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            parent_conn, child_conn = ctx.Pipe()
+            worker = ctx.Process(target=run_worker, daemon=True,
+                                 args=(child_conn, self.buffers.names(), n_games, obs_mode, obs_spec,
+                                       int(lo), int(hi), seed, settings, game_kwargs))
+            worker.start()
+            child_conn.close()
+            self.conns.append(parent_conn)
+            self.workers.append(worker)
+
+    def command(self, cmd):
+        for conn in self.conns:
+            conn.send(cmd)
+        return [conn.recv() for conn in self.conns]
+
+    def reset(self):
+        self.command('reset')
+        return self.observations
+
+    def step(self, actions):
+        """returns (observations, rewards, dones, scores) for all games."""
+        self.actions[:] = actions
+        self.command('step')
+        return self.observations, self.rewards, self.dones, self.scores
+
+    def get_max_score(self):
+        return max(self.command('max_score'))
+
+    def close(self):
+        if not self.workers:
+            return
+        for conn in self.conns:
+            conn.send('close')
+            conn.close()
+        for worker in self.workers:
+            worker.join()
+        self.workers = []
+        self.observations = self.rewards = self.dones = self.scores = self.actions = None
+        self.buffers.close(unlink=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,113 @@
+import json
+import atexit
+import numpy as np
+import pygame
+from time import perf_counter
+
+
+# phases of one main_game frame, in the order they run
+EVENT, CHECK_SCORE, CHECK_NEW_PIPES, UPDATE, COLLISION, DRAW, SHOW_SCORE, FLIP, CAPTURE = range(9)
+PHASES = ('event', 'check_score', 'check_new_pipes', 'update', 'collision', 'draw', 'show_score', 'flip', 'capture')
+
+
+class FrameProfiler(object):
+    """per-phase frame timings in a fixed-size ring buffer.
+
+    the game calls begin() after the clock tick, mark(phase) after each phase
+    and end() once the frame is on screen; nothing is allocated per frame. a
+    frame counts as dropped when its work takes longer than the 1 / fps budget.
+    """
+
+    def __init__(self, fps, capacity=1024, overlay=False, path=None):
+        super(FrameProfiler, self).__init__()
+        self.budget = 1.0 / fps
+        self.capacity = capacity
+        self.durations = np.zeros((capacity, len(PHASES)))
+        self.totals = np.zeros(capacity)
+        self.row = self.durations[0]
+        self.count = 0
+        self.dropped = 0
+        self.last = 0
+        self.start = 0
+
+        self.overlay = overlay
+        self.overlay_refresh = 15
+        self.overlay_font = None
+        self.overlay_lines = []
+
+        if path:
+            atexit.register(self.dump, path)
+
+    def begin(self):
+        self.row = self.durations[self.count % self.capacity]
+        self.row.fill(0)
+        self.start = self.last = perf_counter()
+
+    def mark(self, phase):
+        now = perf_counter()
+        self.row[phase] += now - self.last
+        self.last = now
+
+    def end(self):
+        total = self.last - self.start
+        self.totals[self.count % self.capacity] = total
+        if total > self.budget:
+            self.dropped += 1
+        self.count += 1
+
+    def recorded(self):
+        return min(self.count, self.capacity)
+
+    def summary(self):
+        """frame time percentiles and per-phase means over the buffered frames, in ms."""
+        n = self.recorded()
+        if n == 0:
+            return {'frames': 0}
+        totals = self.totals[:n] * 1e3
+        durations = self.durations[:n] * 1e3
+        p50, p95, p99 = np.percentile(totals, [50, 95, 99])
+        return {
+            'frames': self.count,
+            'budget_ms': self.budget * 1e3,
+            'dropped': self.dropped,
+            'p50_ms': p50,
+            'p95_ms': p95,
+            'p99_ms': p99,
+            'max_ms': totals.max(),
+            'phases_mean_ms': dict(zip(PHASES, durations.mean(axis=0))),
+            'phases_p95_ms': dict(zip(PHASES, np.percentile(durations, 95, axis=0)))
+        }
+
+    def dump(self, path):
+        n = self.recorded()
+        # 环形缓冲区按时间顺序写出
+        order = (np.arange(n) + self.count) % n if n == self.capacity else np.arange(n)
+        with open(path, 'w') as f:
+            json.dump({
+                'summary': self.summary(),
+                'phases': PHASES,
+                'frames_ms': (self.durations[order] * 1e3).tolist()
+            }, f, indent=2)
+
+    def draw_overlay(self, screen, background=None):
+        """draws p50/p95/p99 and dropped frames in the top-left corner, returns the rect."""
+        if self.overlay_font is None:
+            pygame.font.init()
+            self.overlay_font = pygame.font.Font(None, 18)
+        if self.count % self.overlay_refresh == 0 or not self.overlay_lines:
+            summary = self.summary()
+            texts = ['p50 %.2f  p95 %.2f  p99 %.2f ms' % (summary.get('p50_ms', 0), summary.get('p95_ms', 0),
+                                                          summary.get('p99_ms', 0)),
+                     'dropped %d / %d' % (self.dropped, self.count)]
+            self.overlay_lines = [self.overlay_font.render(text, True, (255, 255, 255), (0, 0, 0)) for text in texts]
+
+        width = max(line.get_width() for line in self.overlay_lines)
+        height = sum(line.get_height() for line in self.overlay_lines)
+        rect = pygame.Rect(2, 2, width, height)
+        if background is not None:
+            screen.blit(background, rect, rect)
+        y = rect.y
+        for line in self.overlay_lines:
+            screen.blit(line, (rect.x, y))
+            y += line.get_height()
+        return rect
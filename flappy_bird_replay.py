@@ -0,0 +1,245 @@
+import os
+import sys
+import struct
+import argparse
+import functools
+from array import array
+import multiprocessing as mp
+
+
+# magic, version, rng state at episode start, course_id of the course (0: random pipes),
+# frames, claimed score, number of flaps
+HEADER = struct.Struct('<4sBQQIII')
+# version 1 had no course and is read as recorded on random pipes
+HEADER_V1 = struct.Struct('<4sBQIII')
+MAGIC = b'FBRP'
+VERSION = 2
+EXTENSION = '.fbr'
+
+
+def encode_flaps(flaps):
+    """frame indices as LEB128 varints of the gap to the previous flap (1 byte for gaps < 128)."""
+    out = bytearray()
+    last = 0
+    for frame in flaps:
+        delta = frame - last
+        last = frame
+        while delta >= 0x80:
+            out.append((delta & 0x7F) | 0x80)
+            delta >>= 7
+        out.append(delta)
+    return bytes(out)
+
+
+def decode_flaps(data, count):
+    flaps = array('I')
+    last = value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        last += value
+        flaps.append(last)
+        value = shift = 0
+    if len(flaps) != count:
+        raise ValueError('replay has %d flaps, header says %d' % (len(flaps), count))
+    return flaps
+
+
+def dumps(seed, frames, score, flaps, course=0):
+    return HEADER.pack(MAGIC, VERSION, seed, course, frames, score, len(flaps)) + encode_flaps(flaps)
+
+
+def loads(data):
+    """returns (seed, frames, score, flaps, course) where course is the course_id or 0."""
+    magic, version = struct.unpack_from('<4sB', data)
+    if magic == MAGIC and version == 1:
+        _, _, seed, frames, score, count = HEADER_V1.unpack_from(data)
+        return seed, frames, score, decode_flaps(data[HEADER_V1.size:], count), 0
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('not a version %d flappy bird replay' % VERSION)
+    _, _, seed, course, frames, score, count = HEADER.unpack_from(data)
+    return seed, frames, score, decode_flaps(data[HEADER.size:], count), course
+
+
+class ReplayRecorder(object):
+    """records episodes of a fixed-step Game as compact binary logs.
+
+    Game calls begin() when an episode starts, flap() for every flap and end()
+    when the bird crashes. flap indices go into a reused array, so nothing is
+    allocated on frames without a flap. with a directory each finished episode
+    is written to <directory>/<n>.fbr, otherwise the last one is kept in data.
+    """
+
+    def __init__(self, directory=None):
+        super(ReplayRecorder, self).__init__()
+        self.directory = directory
+        self.episodes = 0
+        self.seed = 0
+        self.course = 0
+        self.flaps = array('I')
+        self.data = None
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def begin(self, seed, course=0):
+        self.seed = seed
+        self.course = course
+        del self.flaps[:]
+
+    def flap(self, frame):
+        self.flaps.append(frame)
+
+    def end(self, frames, score):
+        self.data = dumps(self.seed, frames, score, self.flaps, self.course)
+        if self.directory:
+            path = os.path.join(self.directory, '%d%s' % (self.episodes, EXTENSION))
+            with open(path, 'wb') as f:
+                f.write(self.data)
+        self.episodes += 1
+        return self.data
+
+
+# one headless game per process, reused for every replay it verifies,
+# and the courses it loaded by path
+replay_game = None
+replay_courses = {}
+
+
+def get_game(course=None):
+    """the process' replay game, switched to course (array, .npy path or None)."""
+    global replay_game
+    if isinstance(course, str):
+        if course not in replay_courses:
+            from flappy_bird_course import load_course
+            replay_courses[course] = load_course(course)
+        course = replay_courses[course]
+    if replay_game is None:
+        from flappy_bird import Game, ScoreRecorder
+        replay_game = Game(ScoreRecorder(), headless=True, course=course)
+    elif course is not replay_game.course:
+        replay_game.set_course(course)
+    return replay_game
+
+
+def replay(data, render_frames=(), course=None):
+    """re-simulates a replay headless as fast as possible.
+
+    course is the one the replay was recorded on (None for random pipes),
+    anything else raises ValueError. returns (score, frames, done, used,
+    rendered): done is True when the bird crashed on the last frame replayed,
+    used is how many flaps were applied and rendered maps each requested
+    frame index to a copy of the drawn frame.
+    """
+    seed, max_frames, _, flaps, recorded_course = loads(data)
+    game = get_game(course)
+    if game.course_id != recorded_course:
+        raise ValueError('replay was recorded on course %016x, not %016x' % (recorded_course, game.course_id))
+    game.reset(seed)
+    render_frames = set(render_frames)
+    rendered = {}
+
+    index = 0
+    done = False
+    while not done and game.frame_count < max_frames:
+        # 跟 main_game 一样: 先推进时间，再处理这一帧的扇动，然后更新
+        ticks = game.get_ticks()
+        while index < len(flaps) and flaps[index] == game.frame_count:
+            game.bird.flappy()
+            index += 1
+        done = game.update_frame(ticks)
+        if game.frame_count in render_frames:
+            game.draw_frame()
+            rendered[game.frame_count] = game.screen.copy()
+    return game.score, game.frame_count, done, index, rendered
+
+
+def verify(data, course=None):
+    """True when the replay crashes on its last frame with the claimed score.
+
+    cut short or with flaps after the crash it is rejected, so a replay can
+    only claim the score of a whole episode.
+    """
+    _, frames, score, flaps, _ = loads(data)
+    replayed_score, replayed_frames, done, used, _ = replay(data, course=course)
+    return done and used == len(flaps) and replayed_score == score and replayed_frames == frames
+
+
+def verify_file(path, course=None):
+    with open(path, 'rb') as f:
+        data = f.read()
+    try:
+        _, frames, claimed, flaps, _ = loads(data)
+        score, replayed_frames, done, used, _ = replay(data, course=course)
+    except (ValueError, struct.error) as e:
+        return path, False, None, str(e)
+    ok = done and used == len(flaps) and score == claimed and replayed_frames == frames
+    return path, ok, claimed, score
+
+
+def replay_paths(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.endswith(EXTENSION):
+                    yield os.path.join(path, name)
+        else:
+            yield path
+
+
+def verify_directory(paths, processes=None, course=None):
+    """verifies every replay under paths across processes, returns (path, ok, claimed, actual) rows.
+
+    course is the course they were recorded on; pass its path so each process memory-maps it.
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    files = list(replay_paths(paths))
+    if processes == 1:
+        return [verify_file(path, course) for path in files]
+    # spawn: a forked copy of a process that already runs SDL (audio thread) can hang
+    pool = mp.get_context('spawn').Pool(processes)
+    try:
+        chunksize = max(1, len(files) // (4 * (processes or os.cpu_count() or 1)))
+        return pool.map(functools.partial(verify_file, course=course), files, chunksize=chunksize)
+    finally:
+        # SDL turns SIGTERM into a quit event, so Pool.terminate() would wait on the workers forever
+        pool.close()
+        pool.join()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='verify or render flappy bird replays headless')
+    parser.add_argument('paths', nargs='+', help='replay files or directories of .fbr files')
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--course', help='the course .npy the replays were recorded on')
+    parser.add_argument('--render', metavar='FRAMES', help='comma separated frame indices to save as PNG')
+    parser.add_argument('--output-dir', default='.')
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+    if args.render:
+        import pygame
+        frames = [int(x) for x in args.render.split(',')]
+        for path in replay_paths(args.paths):
+            with open(path, 'rb') as f:
+                rendered = replay(f.read(), frames, args.course)[-1]
+            name = os.path.splitext(os.path.basename(path))[0]
+            for frame, surface in sorted(rendered.items()):
+                pygame.image.save(surface, os.path.join(args.output_dir, '%s_%d.png' % (name, frame)))
+        return 0
+
+    failed = 0
+    for path, ok, claimed, actual in verify_directory(args.paths, args.processes, args.course):
+        if not ok:
+            failed += 1
+            print('FAIL %s claimed %s replayed %s' % (path, claimed, actual))
+    print('%d replays failed' % failed)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,257 @@
+import os
+import sys
+import queue
+import heapq
+import atexit
+import pickle
+import struct
+import argparse
+import threading
+from bisect import bisect_right
+import numpy as np
+
+
+# end screen medals: < 10, < 30, < 70, the rest
+medal_thresholds = (10, 30, 70)
+
+# log file: header, then one (player id, score) record per finished game
+HEADER = struct.Struct('<4sI')
+MAGIC = b'FBSC'
+VERSION = 1
+RECORD = struct.Struct('<II')
+record_dtype = np.dtype([('player', '<u4'), ('score', '<u4')])
+
+
+def check_player(player):
+    """player names are stored one per line, so they cannot contain line breaks."""
+    # 文本模式读回来时 \r 和 \r\n 也会变成换行
+    if '\n' in player or '\r' in player:
+        raise ValueError('player name cannot contain a line break: %r' % (player,))
+
+
+def medal_index(score):
+    return bisect_right(medal_thresholds, score)
+
+
+class ScoreStore(object):
+    """every score ever recorded, with the lookups the end screen needs kept up to date.
+
+    add() updates the indices (max, top-k, per-player bests, medal counts) in
+    place and hands the record to a writer thread, which appends batches to
+    an 8-bytes-a-record log at <path>; player names go to <path>.players. the
+    indices are checkpointed to <path>.index on flush()/close(), so opening a
+    store only reads the records written after the last checkpoint. without a
+    path nothing is written. one process should own a log at a time.
+    """
+
+    def __init__(self, path=None, top_k=10, batch=4096):
+        super(ScoreStore, self).__init__()
+        self.path = path
+        self.top_k = top_k
+        self.batch = batch
+
+        self.count = 0
+        self.max_score = 0
+        self.medals = [0] * (len(medal_thresholds) + 1)
+        self.bests = []
+        # 最小堆 (score, -序号, player)，同分时先进来的留下
+        self.top_heap = []
+        self.players = []
+        self.player_ids = {}
+
+        self.queue = None
+        self.writer = None
+        if path:
+            self.load()
+            self.queue = queue.Queue()
+            self.writer = threading.Thread(target=self.write_loop, name='score-writer', daemon=True)
+            self.writer.start()
+            atexit.register(self.close)
+
+    def player_id(self, player):
+        pid = self.player_ids.get(player)
+        if pid is None:
+            check_player(player)
+            pid = self.player_ids[player] = len(self.players)
+            self.players.append(player)
+            self.bests.append(0)
+            if self.queue is not None:
+                self.queue.put(player)
+        return pid
+
+    def add(self, score, player='player'):
+        """records one finished game; never waits on the disk."""
+        score = int(score)
+        pid = self.player_id(player)
+        if self.queue is not None:
+            self.queue.put((pid, score))
+
+        if score > self.max_score:
+            self.max_score = score
+        if score > self.bests[pid]:
+            self.bests[pid] = score
+        self.medals[medal_index(score)] += 1
+        entry = (score, -self.count, pid)
+        if len(self.top_heap) < self.top_k:
+            heapq.heappush(self.top_heap, entry)
+        elif entry > self.top_heap[0]:
+            heapq.heapreplace(self.top_heap, entry)
+        self.count += 1
+
+    def best(self, player):
+        pid = self.player_ids.get(player)
+        return 0 if pid is None else self.bests[pid]
+
+    def top(self):
+        """[(score, player)] best first."""
+        return [(score, self.players[pid]) for score, _, pid in sorted(self.top_heap, reverse=True)]
+
+    def medal_counts(self):
+        return list(self.medals)
+
+    def write_loop(self):
+        with open(self.path, 'ab') as log, open(self.path + '.players', 'a') as names:
+            while True:
+                items = [self.queue.get()]
+                while len(items) < self.batch:
+                    try:
+                        items.append(self.queue.get_nowait())
+                    except queue.Empty:
+                        break
+                records = bytearray()
+                new_names = []
+                closing = False
+                for item in items:
+                    if item is None:
+                        closing = True
+                    elif isinstance(item, tuple):
+                        records += RECORD.pack(*item)
+                    else:
+                        new_names.append(item + '\n')
+                # 名字先落盘，日志里的 player id 总能查到名字
+                if new_names:
+                    names.write(''.join(new_names))
+                    names.flush()
+                if records:
+                    log.write(records)
+                    log.flush()
+                for _ in items:
+                    self.queue.task_done()
+                if closing:
+                    return
+
+    def flush(self):
+        """waits until every added score is on disk, then checkpoints the indices."""
+        if self.queue is None:
+            return
+        self.queue.join()
+        state = {
+            'version': VERSION,
+            'count': self.count,
+            'max_score': self.max_score,
+            'medals': self.medals,
+            'bests': self.bests,
+            'top_k': self.top_k,
+            'top_heap': self.top_heap,
+        }
+        index_path = self.path + '.index'
+        with open(index_path + '.tmp', 'wb') as f:
+            pickle.dump(state, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(index_path + '.tmp', index_path)
+
+    def close(self):
+        if self.writer is None:
+            return
+        self.flush()
+        self.queue.put(None)
+        self.writer.join()
+        self.writer = None
+        self.queue = None
+        atexit.unregister(self.close)
+
+    def load(self):
+        if not os.path.exists(self.path):
+            with open(self.path, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, VERSION))
+        with open(self.path, 'rb') as f:
+            magic, version = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('%s is not a version %d score log' % (self.path, VERSION))
+
+        if os.path.exists(self.path + '.players'):
+            with open(self.path + '.players') as f:
+                self.players = f.read().split('\n')[:-1]
+        self.player_ids = {name: pid for pid, name in enumerate(self.players)}
+        self.bests = [0] * len(self.players)
+
+        index_path = self.path + '.index'
+        if os.path.exists(index_path):
+            with open(index_path, 'rb') as f:
+                state = pickle.load(f)
+            if state['version'] == VERSION and state['top_k'] == self.top_k:
+                self.count = state['count']
+                self.max_score = state['max_score']
+                self.medals = state['medals']
+                self.bests[:len(state['bests'])] = state['bests']
+                self.top_heap = state['top_heap']
+
+        # 只读上次 checkpoint 之后的记录; 写到一半的尾巴不算
+        size = os.path.getsize(self.path) - HEADER.size
+        total = size // RECORD.size
+        if total > self.count:
+            tail = np.fromfile(self.path, dtype=record_dtype, count=total - self.count,
+                               offset=HEADER.size + self.count * RECORD.size)
+            self.apply(tail)
+        # 截掉写到一半的记录，后面追加的才能对齐
+        if size % RECORD.size:
+            with open(self.path, 'r+b') as f:
+                f.truncate(HEADER.size + total * RECORD.size)
+
+    def apply(self, records):
+        """folds a block of log records into the indices, vectorised."""
+        scores = records['score'].astype(np.int64)
+        players = records['player'].astype(np.int64)
+
+        self.max_score = max(self.max_score, int(scores.max()))
+        bins = np.searchsorted(medal_thresholds, records['score'], side='right')
+        for i, n in enumerate(np.bincount(bins, minlength=len(self.medals))):
+            self.medals[i] += int(n)
+
+        bests = np.zeros(len(self.bests), dtype=np.int64)
+        bests[:] = self.bests
+        np.maximum.at(bests, players, scores)
+        self.bests = bests.tolist()
+        start = self.count
+        self.count += len(records)
+
+        # 第 k 大的分数以上的全要，等于它的只要最早的几条
+        k = min(self.top_k, len(scores))
+        if k == 0:
+            return
+        kth = np.partition(scores, len(scores) - k)[len(scores) - k]
+        above = np.flatnonzero(scores > kth)
+        candidates = np.concatenate([above, np.flatnonzero(scores == kth)[:k - len(above)]])
+        for i in candidates:
+            entry = (int(scores[i]), -(start + int(i)), int(players[i]))
+            if len(self.top_heap) < self.top_k:
+                heapq.heappush(self.top_heap, entry)
+            elif entry > self.top_heap[0]:
+                heapq.heapreplace(self.top_heap, entry)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='summary of a flappy bird score log')
+    parser.add_argument('path')
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    store = ScoreStore(args.path, top_k=args.top)
+    print('games %d, best %d' % (store.count, store.max_score))
+    print('medals (<10, <30, <70, 70+): %s' % ' '.join(str(n) for n in store.medal_counts()))
+    for rank, (score, player) in enumerate(store.top(), 1):
+        print('%3d. %-20s %d' % (rank, player, score))
+    store.close()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
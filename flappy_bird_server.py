@@ -0,0 +1,190 @@
+import os
+import sys
+import signal
+import socket
+import struct
+import asyncio
+import argparse
+import numpy as np
+from flappy_bird_vec import VectorFlappyBird, get_profiles
+from flappy_bird_course import load_course
+
+
+# protocol, all little-endian with fixed sizes so any language can speak it:
+# client -> server once per connection: magic, version, number of games, seed (< 0: random)
+HELLO = struct.Struct('<4sBIq')
+# server -> client: magic, version, number of games accepted (0: refused, the connection is closed)
+WELCOME = struct.Struct('<4sBI')
+MAGIC = b'FBSV'
+VERSION = 1
+# then every request is one op byte followed by one action byte per game (non-zero flaps),
+# and every STEP/RESET is answered with a response of response_size(n) bytes:
+# observation float32 (n, 5), rewards float32 (n), scores int32 (n), dones uint8 (n).
+# finished games are reset automatically, their final score is in scores
+STEP, RESET, CLOSE = range(3)
+OBS_SIZE = 5
+max_games = 1 << 16
+
+
+def response_size(n):
+    return n * (OBS_SIZE * 4 + 4 + 4 + 1)
+
+
+def response_views(buffer, n):
+    """(observation, rewards, scores, dones) numpy views into a response buffer."""
+    obs = np.frombuffer(buffer, dtype=np.float32, count=n * OBS_SIZE).reshape(n, OBS_SIZE)
+    offset = obs.nbytes
+    rewards = np.frombuffer(buffer, dtype=np.float32, count=n, offset=offset)
+    scores = np.frombuffer(buffer, dtype=np.int32, count=n, offset=offset + 4 * n)
+    dones = np.frombuffer(buffer, dtype=np.bool_, count=n, offset=offset + 8 * n)
+    return obs, rewards, scores, dones
+
+
+class Session(object):
+    """one client's games, answered from a response buffer allocated once."""
+
+    def __init__(self, n, seed, course):
+        super(Session, self).__init__()
+        self.n = n
+        self.env = VectorFlappyBird(n, seed=seed, course=course)
+        self.response = bytearray(response_size(n))
+        self.obs, self.rewards, self.scores, self.dones = response_views(self.response, n)
+        # VectorFlappyBird 构造时已经 reset 过一次
+        self.obs[:] = self.env.observation
+
+    def reset(self):
+        self.obs[:] = self.env.reset()
+        self.rewards.fill(0)
+        self.scores.fill(0)
+        self.dones.fill(False)
+        return self.response
+
+    def step(self, actions):
+        obs, rewards, dones, scores = self.env.step(actions)
+        self.obs[:] = obs
+        self.rewards[:] = rewards
+        self.scores[:] = scores
+        self.dones[:] = dones
+        return self.response
+
+
+async def handle_client(reader, writer, course=None):
+    try:
+        magic, version, n, seed = HELLO.unpack(await reader.readexactly(HELLO.size))
+        if magic != MAGIC or version != VERSION or not 0 < n <= max_games:
+            writer.write(WELCOME.pack(MAGIC, VERSION, 0))
+            return
+        session = Session(n, None if seed < 0 else seed, course)
+        writer.write(WELCOME.pack(MAGIC, VERSION, n))
+        writer.write(session.response)
+        while True:
+            # 客户端收到完整的回复才会发下一个请求，所以回复的缓冲区可以复用
+            await writer.drain()
+            request = await reader.readexactly(1 + n)
+            op = request[0]
+            if op == STEP:
+                writer.write(session.step(np.frombuffer(request, dtype=np.uint8, count=n, offset=1)))
+            elif op == RESET:
+                writer.write(session.reset())
+            else:
+                return
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(path, course=None):
+    """serves games on the unix socket at path until cancelled or SIGTERM."""
+    # 赛道和精灵的碰撞轮廓都只加载一次，所有连接共用；新连接不用在事件循环里解码 PNG
+    if isinstance(course, str):
+        course = load_course(course)
+    get_profiles()
+    if os.path.exists(path):
+        os.unlink(path)
+    server = await asyncio.start_unix_server(lambda reader, writer: handle_client(reader, writer, course), path)
+    try:
+        async with server:
+            stop = asyncio.get_running_loop().create_future()
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set_result, None)
+            await stop
+    finally:
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+def run(path, course=None):
+    try:
+        asyncio.run(serve(path, course))
+    except KeyboardInterrupt:
+        pass
+
+
+class Client(object):
+    """blocking reference client: n games on a server, stepped together.
+
+    reset() and step() return views into one receive buffer, valid until the
+    next call.
+    """
+
+    def __init__(self, path, n, seed=-1):
+        super(Client, self).__init__()
+        self.n = n
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(path)
+        self.sock.sendall(HELLO.pack(MAGIC, VERSION, n, seed))
+        welcome = bytearray(WELCOME.size)
+        self.receive_into(memoryview(welcome))
+        magic, version, accepted = WELCOME.unpack(welcome)
+        if magic != MAGIC or version != VERSION or not accepted or accepted != n:
+            self.sock.close()
+            raise ValueError('server refused %d games' % n)
+
+        self.request = bytearray(1 + n)
+        self.actions = np.frombuffer(self.request, dtype=np.uint8, count=n, offset=1)
+        self.response = bytearray(response_size(n))
+        self.response_view = memoryview(self.response)
+        self.obs, self.rewards, self.scores, self.dones = response_views(self.response, n)
+        self.receive_into(self.response_view)
+
+    def receive_into(self, view):
+        while len(view):
+            received = self.sock.recv_into(view)
+            if not received:
+                raise ConnectionError('server closed the connection')
+            view = view[received:]
+
+    def send(self, op):
+        self.request[0] = op
+        self.sock.sendall(self.request)
+        self.receive_into(self.response_view)
+
+    def reset(self):
+        self.send(RESET)
+        return self.obs
+
+    def step(self, actions):
+        """returns (observation, rewards, dones, scores) like VectorFlappyBird.step."""
+        self.actions[:] = actions
+        self.send(STEP)
+        return self.obs, self.rewards, self.dones, self.scores
+
+    def close(self):
+        self.request[0] = CLOSE
+        try:
+            self.sock.sendall(self.request)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='serve headless flappy bird games over a unix socket')
+    parser.add_argument('path')
+    parser.add_argument('--course', help='a course .npy from flappy_bird_course, shared by every game')
+    args = parser.parse_args(argv)
+    run(args.path, args.course)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -1,11 +1,60 @@
 import pygame
+import pygame.surfarray as surfarray
 import sys
 import numpy as np
 import os
+import json
+import pickle
+
+
+# load data of player
+player_path = [
+    'assets/sprites/redbird-upflap.png',
+    'assets/sprites/redbird-midflap.png',
+    'assets/sprites/redbird-downflap.png',
+    'assets/sprites/redbird-midflap.png'
+]
+
+# load path of pipe
+pipe_path = 'assets/sprites/pipe-green.png'
+
+# load path of base back
+base_path = 'assets/sprites/base.png'
+
+
+# binary-alpha sprites (everything but the smoothscaled play button) become RLE
+# colorkey surfaces when this is set; off by default, opaque images always use convert()
+use_colorkey = False
+colorkey = (255, 0, 255)
 
 
 def load_imgs(path):
-    return pygame.image.load(path).convert_alpha()
+    # 先不转格式，convert_image 按图选 convert / convert_alpha / colorkey
+    return pygame.image.load(path)
+
+
+def convert_image(image):
+    """display-format copy of a loaded image, picked from its alpha channel.
+
+    fully opaque images (the backgrounds, the base) use convert() so they are
+    blitted without alpha blending; with use_colorkey images whose alpha is
+    only 0 or 255 become RLE-accelerated colorkey surfaces; the rest keep
+    per-pixel alpha.
+    """
+    if not image.get_flags() & pygame.SRCALPHA:
+        return image.convert()
+    opaque = pygame.mask.from_surface(image, 254).count()
+    if opaque == image.get_width() * image.get_height():
+        return image.convert()
+    if use_colorkey and opaque == pygame.mask.from_surface(image, 0).count():
+        keyed = pygame.Surface(image.get_size()).convert()
+        keyed.fill(colorkey)
+        keyed.blit(image, (0, 0))
+        keyed.set_colorkey(colorkey, pygame.RLEACCEL)
+        # 图里本来就有 colorkey 这个颜色就不能用
+        if pygame.mask.from_surface(keyed).count() == opaque:
+            return keyed
+    return image.convert_alpha()
 
 
 def load_sounds(name, stype):
@@ -18,15 +67,8 @@ def load_sounds(name, stype):
     return pygame.mixer.Sound(os.path.join(sound_base_path, name + soundExt))
 
 
-def load_data():
-    # load data of player
-    player_path = [
-        'assets/sprites/redbird-upflap.png',
-        'assets/sprites/redbird-midflap.png',
-        'assets/sprites/redbird-downflap.png',
-        'assets/sprites/redbird-midflap.png'
-    ]
-
+def load_sprite_files():
+    """unconverted images straight from the separate PNGs."""
     # load path of background
     background_path = [
         './assets/sprites/background-black.png',
@@ -34,12 +76,6 @@ def load_data():
         './assets/sprites/bg_night.png',
     ]
 
-    # load path of pipe
-    pipe_path = 'assets/sprites/pipe-green.png'
-
-    # load path of base back
-    base_path = 'assets/sprites/base.png'
-
     # load path of numbers
     nums_path = ['assets/sprites/' + str(i) + '.png' for i in range(0, 10)]
 
@@ -64,14 +100,12 @@ def load_data():
     # load play button
     play_path = 'assets/sprites/button_play.png'
 
-    images, sounds, hit_masks = {}, {}, {}
+    images = {}
 
     images['numbers'] = [load_imgs(path) for path in nums_path]
     images['player'] = [load_imgs(path) for path in player_path]
-    images['pipe'] = [
-        pygame.transform.rotate(load_imgs(pipe_path), 180),
-        load_imgs(pipe_path)
-    ]
+    pipe = load_imgs(pipe_path)
+    images['pipe'] = [pygame.transform.rotate(pipe, 180), pipe]
     images['base'] = load_imgs(base_path)
     images['background'] = [load_imgs(path) for path in background_path]
     images['medals'] = [load_imgs(path) for path in medals_path]
@@ -80,23 +114,268 @@ def load_data():
     images['score_panel'] = load_imgs(score_panel_path)
     images['buttons'] = [load_imgs(path) for path in buttons_path]
     images['play'] = load_imgs(play_path)
+    images['play_scaled'] = pygame.transform.smoothscale(images['play'], (80, 40))
+
+    return images
+
+
+def load_raw_images():
+    """unconverted images, from the atlas when it has been built."""
+    images = load_atlas()
+    if images is None:
+        images = load_sprite_files()
+    return images
+
+
+def load_images():
+    return map_surfaces(convert_image, load_raw_images())
 
+
+def load_all_sounds():
+    sounds = {}
     sounds_type = ['die', 'hit', 'point', 'swoosh', 'wing']
 
     for stype in sounds_type:
         sounds[stype] = load_sounds(stype, sys.platform)
 
-    hit_masks['pipe'] = [getHitmask(img) for img in images['pipe']]
-    hit_masks['player'] = [getHitmask(img) for img in images['player']]
+    return sounds
+
+
+def load_masks(images):
+    hit_masks = {}
+    hit_masks['pipe'] = [get_mask(img) for img in images['pipe']]
+    hit_masks['player'] = [get_mask(img) for img in images['player']]
+    hit_masks['base'] = get_mask(images['base'])
+    return hit_masks
+
+
+def load_data(sounds=True):
+    """images, sounds and masks; with sounds=False the mixer is not touched and sounds is None."""
+    images = load_images()
+    return images, load_all_sounds() if sounds else None, load_masks(images)
+
+
+# process-wide asset registry, filled on first use and shared by every Game
+assets = {}
+
+# pre-serialized images, and the decoded sounds in a file of their own so a
+# silent game never reads them, both written by save_bundle()
+bundle_path = 'assets/assets.bundle'
+sound_bundle_path = 'assets/sounds.bundle'
+bundle_version = 2
+
+
+# every sprite in one image plus the rect of each, written by save_atlas();
+# uncompressed BMP, decoding one big PNG is slower than the separate small ones
+atlas_path = 'assets/atlas.bmp'
+atlas_index_path = 'assets/atlas.json'
+atlas_version = 1
+
+
+def map_surfaces(func, item):
+    """applies func to every leaf of an images-like tree of dicts and lists."""
+    if isinstance(item, dict):
+        return {key: map_surfaces(func, value) for key, value in item.items()}
+    if isinstance(item, list):
+        return [map_surfaces(func, value) for value in item]
+    return func(item)
+
+
+def pack_surfaces(item):
+    return map_surfaces(lambda surface: (surface.get_size(), pygame.image.tobytes(surface, 'RGBA')), item)
+
+
+def unpack_surfaces(item):
+    return map_surfaces(lambda packed: pygame.image.frombytes(packed[1], packed[0], 'RGBA'), item)
+
+
+def pack_atlas(images, width=1024):
+    """shelf-packs every surface of an images tree into one RGBA sheet.
 
+    returns (sheet, rects, tree) where tree mirrors images with an index into rects.
+    """
+    surfaces = []
+    tree = map_surfaces(lambda surface: surfaces.append(surface) or len(surfaces) - 1, images)
+
+    # 从高到低一排一排放
+    rects = [None] * len(surfaces)
+    x = y = shelf_height = 0
+    for i in sorted(range(len(surfaces)), key=lambda i: -surfaces[i].get_height()):
+        w, h = surfaces[i].get_size()
+        if x + w > width:
+            x, y = 0, y + shelf_height
+            shelf_height = 0
+        rects[i] = [x, y, w, h]
+        x += w
+        shelf_height = max(shelf_height, h)
+
+    sheet = pygame.Surface((width, y + shelf_height), pygame.SRCALPHA, 32)
+    sheet.fill((0, 0, 0, 0))
+    for surface, rect in zip(surfaces, rects):
+        # MAX 混合到全 0 上就是原样拷贝，半透明像素也不会被预乘
+        sheet.blit(surface, rect[:2], special_flags=pygame.BLEND_RGBA_MAX)
+    return sheet, rects, tree
+
+
+def save_atlas(path=atlas_path, index_path=atlas_index_path):
+    """packs the sprite files, the rotated pipe and the scaled play button into one image."""
+    sheet, rects, tree = pack_atlas(load_sprite_files())
+    pygame.image.save(sheet, path)
+    with open(index_path, 'w') as f:
+        json.dump({'version': atlas_version, 'rects': rects, 'images': tree}, f)
+
+
+def load_atlas(path=atlas_path, index_path=atlas_index_path):
+    """unconverted images cut from the atlas, None when it has not been built."""
+    if not (os.path.exists(path) and os.path.exists(index_path)):
+        return None
+    with open(index_path) as f:
+        index = json.load(f)
+    if index.get('version') != atlas_version:
+        return None
+    sheet = pygame.image.load(path)
+    rects = index['rects']
+    return map_surfaces(lambda i: sheet.subsurface(rects[i]), index['images'])
+
+
+def save_bundle(path=bundle_path, sound_path=sound_bundle_path):
+    """writes the images and the decoded sounds to one file each for fast cold start."""
+    bundle = {
+        'version': bundle_version,
+        # 存转换前的 RGBA，colorkey 图读回来时再按 use_colorkey 转
+        'images': pack_surfaces(load_raw_images()),
+    }
+    with open(path, 'wb') as f:
+        pickle.dump(bundle, f, pickle.HIGHEST_PROTOCOL)
+
+    sound_bundle = {
+        'version': bundle_version,
+        'mixer': pygame.mixer.get_init(),
+        'sounds': {name: sound.get_raw() for name, sound in load_all_sounds().items()}
+    }
+    with open(sound_path, 'wb') as f:
+        pickle.dump(sound_bundle, f, pickle.HIGHEST_PROTOCOL)
+
+
+def load_bundle(path=bundle_path, key='bundle'):
+    if key not in assets:
+        bundle = None
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                bundle = pickle.load(f)
+            if bundle.get('version') != bundle_version:
+                bundle = None
+        assets[key] = bundle
+    return assets[key]
+
+
+def get_sound_samples():
+    """the sound bundle's raw samples, or None when there is none for the mixer's current format."""
+    bundle = load_bundle(sound_bundle_path, 'sound_bundle')
+    # raw samples are only valid for the mixer format they were decoded with
+    if bundle is not None and bundle['mixer'] != pygame.mixer.get_init():
+        bundle = assets['sound_bundle'] = None
+    return None if bundle is None else bundle['sounds']
+
+
+class ImageRegistry(dict):
+    """the images dict, each top-level entry converted on first access.
+
+    a headless game without rendering only ever touches player, pipe and base;
+    backgrounds and the welcome/end screen images are converted when first drawn.
+    """
+
+    def __init__(self, raw):
+        super(ImageRegistry, self).__init__()
+        self.raw = raw
+
+    def __missing__(self, key):
+        value = self[key] = map_surfaces(convert_image, self.raw[key])
+        return value
+
+
+def get_images():
+    if 'images' not in assets:
+        bundle = load_bundle()
+        if bundle is not None:
+            raw = unpack_surfaces(bundle['images'])
+        else:
+            raw = load_raw_images()
+        assets['images'] = ImageRegistry(raw)
+    return assets['images']
+
+
+def get_sounds():
+    if 'sounds' not in assets:
+        samples = get_sound_samples()
+        if samples is not None:
+            assets['sounds'] = {name: pygame.mixer.Sound(buffer=raw) for name, raw in samples.items()}
+        else:
+            assets['sounds'] = load_all_sounds()
+        assets.pop('sound_bundle', None)
+    return assets['sounds']
+
+
+def get_sound(name):
+    """a single sound, decoded on first use (for backends that only play some of them)."""
+    if 'sounds' in assets:
+        return assets['sounds'][name]
+    sounds = assets.setdefault('sound', {})
+    if name not in sounds:
+        samples = get_sound_samples()
+        if samples is not None:
+            sounds[name] = pygame.mixer.Sound(buffer=samples[name])
+            # Sound 拷了一份样本，全都建好后 bundle 就不用留着了
+            if len(sounds) == len(samples):
+                assets.pop('sound_bundle', None)
+        else:
+            sounds[name] = load_sounds(name, sys.platform)
+    return sounds[name]
+
+
+def get_hit_masks():
+    if 'hit_masks' not in assets:
+        assets['hit_masks'] = load_masks(get_images())
+    return assets['hit_masks']
+
+
+def get_data(sounds=True):
+    """cached load_data(): loads once per process, optionally from the on-disk bundle."""
+    images, hit_masks = get_images(), get_hit_masks()
+    sounds = get_sounds() if sounds else None
+    assets.pop('bundle', None)
     return images, sounds, hit_masks
 
 
+def load_hitmasks():
+    """hitmasks of player frames, pipes and base without a display (no convert)."""
+    pipe = pygame.image.load(pipe_path)
+    return {
+        'player': [getHitmask(pygame.image.load(path)) for path in player_path],
+        'pipe': [getHitmask(pygame.transform.rotate(pipe, 180)), getHitmask(pipe)],
+        'base': getHitmask(pygame.image.load(base_path))
+    }
+
+
 def getHitmask(image):
-    """returns a hitmask using an image's alpha."""
-    mask = []
-    for x in range(image.get_width()):
-        mask.append([])
-        for y in range(image.get_height()):
-            mask[x].append(bool(image.get_at((x, y))[3]))
-    return mask
+    """returns a hitmask using an image's alpha, as lists indexed mask[x][y]."""
+    return get_hitmask_array(image).tolist()
+
+
+def get_hitmask_array(image):
+    """getHitmask as a (width, height) bool array."""
+    return surfarray.array_alpha(image) > 0
+
+
+def get_mask(image):
+    """returns a bit-packed pygame mask built from an image's alpha, same as getHitmask."""
+    return pygame.mask.from_surface(image, 0)
+
+
+if __name__ == '__main__':
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    save_atlas()
+    save_bundle()
@@ -0,0 +1,281 @@
+import numpy as np
+from flappy_bird_utils import load_hitmasks
+from flappy_bird_course import load_course, check_course
+
+
+def column_profile(hitmask):
+    """first and last opaque row of every column of a hitmask (x, y indexed).
+
+    empty columns get top > bottom so they never overlap anything.
+    """
+    mask = np.asarray(hitmask, dtype=bool)
+    height = mask.shape[1]
+    filled = mask.any(axis=1)
+    top = np.where(filled, mask.argmax(axis=1), height)
+    bottom = np.where(filled, height - 1 - mask[:, ::-1].argmax(axis=1), -1)
+    return top.astype(np.int32), bottom.astype(np.int32)
+
+
+# column profiles of the sprites, decoded from the PNGs once per process and
+# shared read-only by every VectorFlappyBird
+profiles = None
+
+
+def get_profiles():
+    global profiles
+    if profiles is None:
+        hit_masks = load_hitmasks()
+        bird = [column_profile(mask) for mask in hit_masks['player']]
+        pipe_tops, pipe_bottoms = column_profile(hit_masks['pipe'][0])
+        base_tops, base_bottoms = column_profile(hit_masks['base'])
+        profiles = {
+            'bird_tops': np.stack([top for top, _ in bird]),
+            'bird_bottoms': np.stack([bottom for _, bottom in bird]),
+            'bird_height': len(hit_masks['player'][0][0]),
+            'pipe_tops': pipe_tops,
+            'pipe_bottoms': pipe_bottoms,
+            'pipe_height': len(hit_masks['pipe'][0][0]),
+            'base_tops': base_tops,
+            'base_bottoms': base_bottoms,
+        }
+        for value in profiles.values():
+            if isinstance(value, np.ndarray):
+                value.setflags(write=False)
+    return profiles
+
+
+class VectorFlappyBird(object):
+    """n independent games advanced in lockstep with array operations.
+
+    follows the fixed-step rules of Game: Bird.calc_vector/flappy for the bird,
+    get_random_pipes/check_new_pipes for the pipes, check_score for scoring and
+    check_collision (bird mask vs upper pipe and base, bird rect vs lower pipe).
+    finished games are reset automatically. with a course (an array from
+    flappy_bird_course or the path of a saved one) every game plays it from
+    the first pipe like Game(course=...), otherwise gaps are drawn from rng.
+    """
+
+    def __init__(self, n, seed=None, course=None):
+        super(VectorFlappyBird, self).__init__()
+        self.n = n
+        self.rng = np.random.default_rng(seed)
+        if isinstance(course, str):
+            course = load_course(course)
+        elif course is not None:
+            check_course(course)
+        self.course = course
+
+        self.screen_width = 288
+        self.screen_height = 512
+        self.pipe_gap_size = 100
+        self.base_y = self.screen_height * 0.79
+        self.gap_ys = np.array([20, 30, 40, 50, 60, 70, 80, 90, 100, 110], dtype=np.int32) + int(self.base_y * 0.2)
+
+        self.bird_vec_y_max = 10
+        self.bird_acc_y = 1
+        self.bird_flappy_acc_y = -20
+        self.pipe_val_x = -4
+        self.base_rate = 100
+
+        self.load_profiles()
+
+        self.bird_x = int(self.screen_width * 0.2)
+        self.bird_init_y = int((self.screen_height - self.bird_height) / 2)
+        self.bird_mid_x = self.bird_x + self.bird_width / 2
+        self.bird_cols = self.bird_x + np.arange(self.bird_width, dtype=np.int32)
+        self.pipe_init_x = self.screen_width + 10
+        self.pipe_threshold = 2 * self.pipe_width
+
+        self.bird_y = np.zeros(n, dtype=np.int32)
+        self.bird_vec_y = np.zeros(n, dtype=np.int32)
+        self.frame_count = np.zeros(n, dtype=np.int32)
+        self.base_x = np.zeros(n, dtype=np.int32)
+        self.score = np.zeros(n, dtype=np.int32)
+        # two slots are enough: a new pair spawns at x = 102 and the old one leaves at x < -52
+        self.pipe_x = np.zeros((n, 2), dtype=np.int32)
+        self.pipe_gap_y = np.zeros((n, 2), dtype=np.int32)
+        self.pipe_valid = np.zeros((n, 2), dtype=bool)
+        self.pipe_gap_sizes = np.full((n, 2), self.pipe_gap_size, dtype=np.int32)
+        # (n, 1) 直接跟 (n, 2) 的管子数组广播
+        self.speed = np.full((n, 1), -self.pipe_val_x, dtype=np.int32)
+        self.base_rates = np.full(n, self.base_rate, dtype=np.int32)
+        # course 模式: 下一对管子在赛道里的序号和它离上一对的距离
+        self.course_index = np.zeros(n, dtype=np.int64)
+        self.next_spacing = np.zeros(n, dtype=np.int32)
+
+        self.base_ys = np.full(n, int(self.base_y), dtype=np.int32)
+        self.observation = np.zeros((n, 5), dtype=np.float32)
+        self.rewards = np.zeros(n, dtype=np.float32)
+        self.all_envs = np.ones(n, dtype=bool)
+
+        self.reset()
+
+    def load_profiles(self):
+        p = get_profiles()
+        self.bird_tops, self.bird_bottoms = p['bird_tops'], p['bird_bottoms']
+        self.bird_frame_nums, self.bird_width = self.bird_tops.shape
+        self.bird_height = p['bird_height']
+
+        self.pipe_tops, self.pipe_bottoms = p['pipe_tops'], p['pipe_bottoms']
+        self.pipe_width = len(self.pipe_tops)
+        self.pipe_height = p['pipe_height']
+
+        self.base_tops, self.base_bottoms = p['base_tops'], p['base_bottoms']
+        self.base_width = len(self.base_tops)
+        self.base_shift = self.base_width - self.screen_width
+
+    def random_gap_ys(self, count):
+        return self.gap_ys[self.rng.integers(0, len(self.gap_ys), size=count)]
+
+    def reset(self, envs=None):
+        """resets the selected games (all by default) and returns the observation."""
+        if envs is None:
+            envs = self.all_envs
+        count = int(np.count_nonzero(envs))
+        if count:
+            self.bird_y[envs] = self.bird_init_y
+            self.bird_vec_y[envs] = 0
+            self.frame_count[envs] = 0
+            self.base_x[envs] = 0
+            self.score[envs] = 0
+            self.pipe_x[envs, 0] = self.pipe_init_x
+            self.pipe_valid[envs, 0] = True
+            self.pipe_valid[envs, 1] = False
+            if self.course is None:
+                self.pipe_gap_y[envs, 0] = self.random_gap_ys(count)
+            else:
+                first = self.course[0]
+                self.pipe_gap_y[envs, 0] = first['gap_y']
+                self.pipe_gap_sizes[envs, 0] = first['gap_size']
+                self.course_index[envs] = 1
+                self.next_spacing[envs] = self.course[1 % len(self.course)]['spacing']
+                self.speed[envs] = first['speed']
+                self.base_rates[envs] = first['speed']
+        return self.observe()
+
+    def spawn_course_pipes(self):
+        # 管子间距至少 176，新的一对生成时第二格一定是空的
+        spawn = ~self.pipe_valid[:, 1] & (self.pipe_x[:, 0] + self.next_spacing <= self.pipe_init_x)
+        if not spawn.any():
+            return
+        course = self.course
+        rows = self.course_index[spawn] % len(course)
+        self.pipe_x[spawn, 1] = self.pipe_x[spawn, 0] + course['spacing'][rows]
+        self.pipe_gap_y[spawn, 1] = course['gap_y'][rows]
+        self.pipe_gap_sizes[spawn, 1] = course['gap_size'][rows]
+        self.pipe_valid[spawn, 1] = True
+        self.course_index[spawn] += 1
+        self.next_spacing[spawn] = course['spacing'][self.course_index[spawn] % len(course)]
+
+    def observe(self):
+        """bird y, bird_vec_y, distance to the next pipe pair and its gap top/bottom."""
+        ahead = self.pipe_x[:, 0] + self.pipe_width > self.bird_x
+        next_x = np.where(ahead, self.pipe_x[:, 0], self.pipe_x[:, 1])
+        next_gap = np.where(ahead, self.pipe_gap_y[:, 0], self.pipe_gap_y[:, 1])
+        next_size = np.where(ahead, self.pipe_gap_sizes[:, 0], self.pipe_gap_sizes[:, 1])
+
+        obs = self.observation
+        obs[:, 0] = self.bird_y
+        obs[:, 1] = self.bird_vec_y
+        obs[:, 2] = next_x - self.bird_x
+        obs[:, 3] = next_gap
+        obs[:, 4] = next_gap + next_size
+        return obs
+
+    def calc_vector(self, acc):
+        return np.clip(self.bird_vec_y + acc, -self.bird_vec_y_max, self.bird_vec_y_max)
+
+    def hit_mask(self, frames, obj_x, obj_y, obj_tops, obj_bottoms):
+        """bird mask overlap with an object given by its column profile.
+
+        only games whose bird rect touches the object's rect get the per-column test.
+        """
+        crashed = self.hit_rect(obj_x, obj_y, len(obj_tops), obj_bottoms.max() + 1)
+        near = np.flatnonzero(crashed)
+        if len(near) == 0:
+            return crashed
+
+        cols = self.bird_cols[None, :] - obj_x[near, None]
+        inside = (cols >= 0) & (cols < len(obj_tops))
+        cols = np.clip(cols, 0, len(obj_tops) - 1)
+
+        bird_y = self.bird_y[near, None]
+        obj_y = obj_y[near, None]
+        overlap = (inside &
+                   (bird_y + self.bird_tops[frames[near]] <= obj_y + obj_bottoms[cols]) &
+                   (bird_y + self.bird_bottoms[frames[near]] >= obj_y + obj_tops[cols]))
+        crashed[near] = overlap.any(axis=1)
+        return crashed
+
+    def hit_rect(self, obj_x, obj_y, obj_width, obj_height):
+        return ((obj_x < self.bird_x + self.bird_width) & (obj_x + obj_width > self.bird_x) &
+                (obj_y < self.bird_y + self.bird_height) & (obj_y + obj_height > self.bird_y))
+
+    def check_collision(self):
+        frames = self.frame_count % self.bird_frame_nums
+        crashed = np.zeros(self.n, dtype=bool)
+        for slot in range(2):
+            valid = self.pipe_valid[:, slot]
+            x = self.pipe_x[:, slot]
+            gap_y = self.pipe_gap_y[:, slot]
+            crashed |= valid & self.hit_mask(frames, x, gap_y - self.pipe_height, self.pipe_tops, self.pipe_bottoms)
+            crashed |= valid & self.hit_rect(x, gap_y + self.pipe_gap_sizes[:, slot], self.pipe_width, self.pipe_height)
+        crashed |= self.hit_mask(frames, self.base_x, self.base_ys, self.base_tops, self.base_bottoms)
+        return crashed
+
+    def step(self, actions):
+        """advances every game one frame, returns (observation, rewards, dones, scores).
+
+        scores are taken before the automatic reset, so finished games report
+        their final score.
+        """
+        flap = np.asarray(actions, dtype=bool)
+
+        # Bird.flappy
+        self.bird_vec_y[flap] = self.calc_vector(self.bird_flappy_acc_y)[flap]
+        self.bird_y[flap] = np.maximum(self.bird_y[flap] + self.bird_vec_y[flap], 0)
+
+        # Game.check_score
+        pipe_mid_x = self.pipe_x + self.pipe_width / 2
+        scored = self.pipe_valid & (pipe_mid_x <= self.bird_mid_x) & (self.bird_mid_x < pipe_mid_x + self.speed)
+        gained = scored.sum(axis=1)
+        self.score += gained
+        if self.course is not None and gained.any():
+            faster = gained > 0
+            self.speed[faster, 0] = self.course['speed'][self.score[faster] % len(self.course)]
+            self.base_rates[faster] = self.speed[faster, 0]
+
+        # Game.check_new_pipes
+        leave = self.pipe_x[:, 0] < -self.pipe_width
+        self.pipe_x[leave, 0] = self.pipe_x[leave, 1]
+        self.pipe_gap_y[leave, 0] = self.pipe_gap_y[leave, 1]
+        self.pipe_gap_sizes[leave, 0] = self.pipe_gap_sizes[leave, 1]
+        self.pipe_valid[leave, 1] = False
+        if self.course is None:
+            spawn = (self.pipe_threshold - 4 < self.pipe_x[:, 0]) & (self.pipe_x[:, 0] < self.pipe_threshold)
+            count = int(np.count_nonzero(spawn))
+            if count:
+                self.pipe_x[spawn, 1] = self.pipe_init_x
+                self.pipe_gap_y[spawn, 1] = self.random_gap_ys(count)
+                self.pipe_valid[spawn, 1] = True
+        else:
+            self.spawn_course_pipes()
+
+        # sprite updates, one fixed step each
+        self.pipe_x -= self.speed
+        self.bird_vec_y[:] = self.calc_vector(self.bird_acc_y)
+        self.bird_y += self.bird_vec_y
+        self.frame_count += 1
+        self.base_x[:] = -((-self.base_x + self.base_rates) % self.base_shift)
+
+        dones = self.check_collision()
+        scores = self.score.copy()
+
+        rewards = self.rewards
+        rewards.fill(0.1)
+        rewards[gained > 0] = 1
+        rewards[dones] = -1
+
+        if dones.any():
+            self.reset(dones)
+        return self.observe(), rewards, dones, scores
@@ -0,0 +1,42 @@
+import os
+import sys
+import time
+import threading
+
+# 没有窗口和声卡也能跑；素材路径都是相对仓库根目录的
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+# 环境变量要在 import pygame 之前设好
+import pygame  # noqa: E402
+import pytest  # noqa: E402
+
+
+def post_presses(stop, interval):
+    while not stop.is_set():
+        time.sleep(interval)
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE))
+
+
+@pytest.fixture
+def press_space():
+    """press_space(interval) posts a SPACE press every interval seconds from a thread until the test ends."""
+    stop = threading.Event()
+    threads = []
+
+    def start(interval):
+        thread = threading.Thread(target=post_presses, args=(stop, interval), daemon=True)
+        thread.start()
+        threads.append(thread)
+
+    yield start
+    stop.set()
+    for thread in threads:
+        thread.join()
+    # 停下之前发出的按键别留给下一个测试
+    pygame.event.clear()
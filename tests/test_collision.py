@@ -0,0 +1,42 @@
+import os
+import pygame
+import pytest
+from flappy_bird_collision import CollisionChecker, verify
+from flappy_bird_replay import loads, replay, get_game
+from flappy_bird_utils import getHitmask, get_hitmask_array, pipe_path
+
+# 录好的回放: 撞上管、撞下管、掉到地上、飞到顶上撞管子都有
+REPLAYS = os.path.join(os.path.dirname(__file__), 'replays')
+
+
+def replay_files():
+    return sorted(os.path.join(REPLAYS, name) for name in os.listdir(REPLAYS) if name.endswith('.fbr'))
+
+
+def test_modes_agree():
+    checks, hits, disagreements = verify(episodes=20, seed=1)
+    assert hits >= 20
+    assert checks > hits
+    assert disagreements == 0
+
+
+@pytest.mark.parametrize('path', replay_files(), ids=os.path.basename)
+def test_stored_replays_in_both_modes(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    _, frames, score, flaps, _ = loads(data)
+    game = get_game()
+    try:
+        for mode in CollisionChecker.modes:
+            game.collision = CollisionChecker(game, mode)
+            assert replay(data)[:4] == (score, frames, True, len(flaps)), mode
+    finally:
+        game.collision = CollisionChecker(game, 'analytic')
+
+
+def test_get_hitmask_keeps_returning_lists():
+    image = pygame.image.load(pipe_path)
+    mask = getHitmask(image)
+    assert type(mask) is list and type(mask[0]) is list and type(mask[0][0]) is bool
+    assert mask == get_hitmask_array(image).tolist()
+    assert any(mask[0]) and not all(mask[0])
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+from flappy_bird import Game, ScoreRecorder
+from flappy_bird_vec import VectorFlappyBird
+from flappy_bird_course import make_course, save_course, load_course, check_course, schedules
+
+
+def test_generated_courses_pass():
+    for schedule in schedules:
+        check_course(make_course(0, schedule=schedule))
+
+
+@pytest.mark.parametrize('field, value', [('spacing', 150), ('spacing', 400), ('speed', 0), ('speed', 30),
+                                          ('gap_size', 0), ('gap_y', -10), ('gap_y', 350)])
+def test_malformed_course_is_rejected(tmp_path, field, value):
+    course = make_course(0)
+    course[7][field] = value
+    path = str(tmp_path / 'bad.npy')
+    save_course(path, course)
+
+    with pytest.raises(ValueError, match='pipe 7'):
+        load_course(path)
+    with pytest.raises(ValueError):
+        Game(ScoreRecorder(), headless=True, course=course)
+    with pytest.raises(ValueError):
+        Game(ScoreRecorder(), headless=True, course=path)
+    with pytest.raises(ValueError):
+        VectorFlappyBird(2, course=course)
+
+
+def test_not_a_course_is_rejected():
+    with pytest.raises(ValueError):
+        check_course(np.zeros(10, dtype=np.int16))
+    with pytest.raises(ValueError):
+        check_course(make_course(0)[:0])
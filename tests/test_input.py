@@ -0,0 +1,35 @@
+from time import perf_counter
+import pygame
+from flappy_bird import Game, ScoreRecorder
+from flappy_bird_input import InputLatency
+
+
+def make_game(latency, early_flap=True):
+    game = Game(ScoreRecorder(), headless=True, render=True, fixed_step=True, seed=2,
+                early_flap=early_flap, input_latency=latency)
+    game.frame_seconds = 0.005
+    game.reset(2)
+    return game
+
+
+def test_early_press_does_not_advance_the_world():
+    latency = InputLatency()
+    game = make_game(latency)
+    frame_count, y = game.frame_count, game.bird.y
+    game.next_frame = perf_counter() + 0.05
+    pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE))
+    game.wait_frame(game.early_press)
+
+    assert game.frame_count == frame_count
+    assert game.bird.y < y and game.bird.rect.y == game.bird.y
+    assert game.read_input() == []
+    assert latency.count == latency.shown == 1
+
+
+def test_crash_frame_presses_are_discarded(press_space):
+    latency = InputLatency()
+    game = make_game(latency, early_flap=False)
+    press_space(0.004)
+    game.main_game()
+    assert latency.count > 0
+    assert latency.pending == []
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from multiprocessing import shared_memory
+from flappy_bird import Game, ScoreRecorder
+from flappy_bird_pool import GamePool
+
+# 测试进程里已经开着 SDL，fork 出来的子进程可能卡住
+START_METHOD = 'spawn'
+
+
+def serial_games(n, seed, obs_mode, **settings):
+    games = []
+    for i in range(n):
+        game = Game(ScoreRecorder(), headless=True, seed=seed + i, obs_mode=obs_mode)
+        for key, value in settings.items():
+            setattr(game, key, value)
+        games.append(game)
+    return games
+
+
+def check_against_serial(pool, games, steps):
+    np.testing.assert_array_equal(pool.reset(), [game.reset() for game in games])
+    rng = np.random.default_rng(0)
+    for _ in range(steps):
+        actions = rng.random(len(games)) < 0.1
+        obs, rewards, dones, scores = pool.step(actions)
+        for i, game in enumerate(games):
+            expected, reward, done, score = game.step(actions[i])
+            assert (rewards[i], dones[i], scores[i]) == (np.float32(reward), done, score)
+            if done:
+                expected = game.reset()
+            np.testing.assert_array_equal(obs[i], expected)
+
+
+def test_state_pool_matches_serial_games():
+    with GamePool(4, n_workers=2, seed=10, start_method=START_METHOD) as pool:
+        assert pool.observations.shape == (4, 5)
+        check_against_serial(pool, serial_games(4, 10, 'state'), 300)
+        assert pool.dones.dtype == np.bool_
+
+
+def test_pixel_settings_shape_the_buffer():
+    settings = {'obs_size': (32, 48), 'obs_grayscale': False, 'frame_stack': 2}
+    with GamePool(2, n_workers=1, seed=3, obs_mode='pixels', start_method=START_METHOD, **settings) as pool:
+        assert pool.observations.shape == (2, 2, 48, 32, 3)
+        check_against_serial(pool, serial_games(2, 3, 'pixels', **settings), 40)
+
+
+def test_close_unlinks_shared_memory():
+    pool = GamePool(2, n_workers=1, seed=0, start_method=START_METHOD)
+    names = pool.buffers.names()
+    pool.close()
+    assert not pool.workers
+    for name in names.values():
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
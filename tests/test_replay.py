@@ -0,0 +1,83 @@
+import random
+import numpy as np
+import pygame
+import pytest
+from flappy_bird import Game, ScoreRecorder
+from flappy_bird_course import make_course
+from flappy_bird_replay import ReplayRecorder, dumps, loads, replay, verify
+
+
+def policy(state, rng):
+    return state[0] > state[4] - 40 or rng.random() < 0.01
+
+
+def record_headless(seed, course=None):
+    recorder = ReplayRecorder()
+    game = Game(ScoreRecorder(), headless=True, seed=seed, replay_recorder=recorder, course=course)
+    rng = random.Random(seed)
+    state, done = game.reset(seed), False
+    while not done:
+        state, _, done, _ = game.step(policy(state, rng))
+    return recorder.data
+
+
+def test_headless_replay_verifies():
+    for seed in range(5):
+        assert verify(record_headless(seed))
+
+
+def test_tampered_replay_fails():
+    seed, frames, score, flaps, _ = loads(record_headless(0))
+    assert not verify(dumps(seed, frames, score + 1, flaps))
+    assert not verify(dumps(seed, frames, score, flaps[:len(flaps) // 2]))
+
+
+def test_truncated_replay_fails():
+    seed, frames, score, flaps, _ = loads(record_headless(2))
+    assert score > 0
+    # 截在半路: 帧数改小，带上那一帧的分数和之前的扇动，看起来也能对上
+    cut = frames - 20
+    kept = [frame for frame in flaps if frame <= cut]
+    cut_score, cut_frames, done, _, _ = replay(dumps(seed, cut, 0, kept))
+    assert cut_frames == cut and not done
+    assert not verify(dumps(seed, cut, cut_score, kept))
+
+
+def test_flaps_after_the_crash_fail():
+    seed, frames, score, flaps, _ = loads(record_headless(2))
+    assert not verify(dumps(seed, frames, score, list(flaps) + [frames + 5]))
+
+
+def test_course_replay_verifies_on_its_course_only(tmp_path):
+    course = make_course(1, schedule='ramp')
+    path = str(tmp_path / 'ramp.npy')
+    np.save(path, course)
+    data = record_headless(2, course)
+    assert loads(data)[4] != 0
+    assert verify(data, course)
+    assert verify(data, path)
+    with pytest.raises(ValueError):
+        verify(data)
+    with pytest.raises(ValueError):
+        verify(data, make_course(2, schedule='ramp'))
+    # 换回随机管子后，没有赛道的录像照样能验证
+    assert verify(record_headless(2))
+
+
+def test_main_game_replay_verifies(press_space):
+    """records through the interactive welcome + main_game loop, the way --record does."""
+    recorder = ReplayRecorder()
+    game = Game(ScoreRecorder(), headless=True, render=True, fixed_step=True, seed=3, replay_recorder=recorder)
+    game.frame_seconds = 0.005
+
+    pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE))
+    game.welcome_game()
+    assert game.frame_count > 0
+
+    press_space(0.04)
+    end_infos = game.main_game()
+
+    _, frames, score, flaps, _ = loads(recorder.data)
+    assert score == end_infos['score']
+    assert len(flaps) > 0
+    assert verify(recorder.data)
@@ -0,0 +1,35 @@
+import pytest
+from flappy_bird import ScoreRecorder
+from flappy_bird_scores import ScoreStore
+
+
+def test_players_survive_reopening(tmp_path):
+    path = str(tmp_path / 'scores.log')
+    store = ScoreStore(path)
+    for score, player in [(3, 'ann'), (12, 'bob'), (7, 'ann'), (40, 'cy')]:
+        store.add(score, player)
+    store.close()
+
+    store = ScoreStore(path)
+    assert [store.best(player) for player in ('ann', 'bob', 'cy')] == [7, 12, 40]
+    assert store.top()[0] == (40, 'cy')
+    store.close()
+
+
+@pytest.mark.parametrize('player', ['a\nb', 'a\rb', 'a\r\n'])
+def test_line_breaks_in_player_names_are_rejected(tmp_path, player):
+    path = str(tmp_path / 'scores.log')
+    store = ScoreStore(path)
+    store.add(5, 'ann')
+    with pytest.raises(ValueError):
+        store.add(9, player)
+    store.add(6, 'bob')
+    store.close()
+
+    store = ScoreStore(path)
+    assert store.players == ['ann', 'bob']
+    assert (store.best('ann'), store.best('bob')) == (5, 6)
+    store.close()
+
+    with pytest.raises(ValueError):
+        ScoreRecorder(path, player)
@@ -0,0 +1,48 @@
+import random
+import pytest
+from flappy_bird import Game, ScoreRecorder, SNAPSHOT
+from flappy_bird_course import make_course
+
+
+def play(game, seed, frames=3000):
+    """plays a seeded policy until the bird crashes, returns every (state, reward, done, score)."""
+    rng = random.Random(seed)
+    trace = []
+    for _ in range(frames):
+        state = game.get_state()
+        state, reward, done, _ = game.step(state[0] > state[4] - 40 or rng.random() < 0.01)
+        trace.append((tuple(state), reward, done, game.score))
+        if done:
+            break
+    return trace
+
+
+@pytest.mark.parametrize('course', [None, make_course(5, schedule='ramp')], ids=['random', 'course'])
+def test_restore_replays_the_same_future(course):
+    game = Game(ScoreRecorder(), headless=True, course=course)
+    for seed in range(5):
+        game.reset(seed)
+        assert not play(game, seed, 40)[-1][2]
+        snap = game.snapshot()
+        assert len(snap) == SNAPSHOT.size
+        expected = play(game, seed + 100)
+        assert expected[-1][2]
+
+        # 从快照分出另一条路，再回到快照，后面的结果要一模一样
+        game.restore(snap)
+        play(game, seed + 200)
+        game.restore(snap)
+        assert play(game, seed + 100) == expected
+
+
+def test_restore_across_episodes():
+    game = Game(ScoreRecorder(), headless=True)
+    game.reset(1)
+    play(game, 1, 60)
+    snap = game.snapshot()
+    expected = play(game, 2)
+
+    game.reset(7)
+    play(game, 7)
+    game.restore(snap)
+    assert play(game, 2) == expected
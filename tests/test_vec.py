@@ -0,0 +1,38 @@
+import random
+import numpy as np
+import pytest
+from flappy_bird import Game, ScoreRecorder
+from flappy_bird_vec import VectorFlappyBird
+from flappy_bird_course import make_course
+
+
+@pytest.mark.parametrize('schedule', ['classic', 'ramp'])
+def test_matches_game_on_a_course(schedule):
+    """n games stepped together match n Game instances frame by frame.
+
+    random pipes come from different generators, a course makes both engines
+    see the same pipes.
+    """
+    n = 8
+    course = make_course(5, schedule=schedule)
+    games = [Game(ScoreRecorder(), headless=True, course=course) for _ in range(n)]
+    states = [game.reset(0) for game in games]
+    policies = [random.Random(i) for i in range(n)]
+    env = VectorFlappyBird(n, course=course)
+    np.testing.assert_array_equal(env.observation, states)
+
+    crashes = 0
+    for _ in range(1500):
+        actions = [state[0] > state[4] - 30 - 2 * i or policy.random() < 0.01
+                   for i, (state, policy) in enumerate(zip(states, policies))]
+        obs, _, dones, scores = env.step(actions)
+        for i, game in enumerate(games):
+            state, _, done, _ = game.step(actions[i])
+            assert dones[i] == done
+            assert scores[i] == game.score
+            if done:
+                crashes += 1
+                state = game.reset(0)
+            np.testing.assert_array_equal(obs[i], state)
+            states[i] = state
+    assert crashes > n